@@ -0,0 +1,164 @@
+"""
+Async vs sync benchmark for the rule-based metrics, direct and through deepeval's evaluate()
+
+A simulated LLM-as-judge metric (fixed latency, no API calls) runs next to
+the six rule-based metrics, so the async path has I/O to overlap with
+scoring. The direct section awaits a_measure for every (case, metric) with
+bounded concurrency, compares it with a plain measure loop and checks that
+both give identical results; the evaluate section times deepeval's
+evaluate() with async execution on and off. EVAL_METRIC_EXECUTOR selects
+where a_measure scores (thread, process or inline).
+
+Usage:
+    python -m benchmarks.bench_async_measure [--cases 3000] [--judge-latency 0.01] [--concurrency 100] [--skip-evaluate]
+"""
+import copy
+import time
+import asyncio
+import argparse
+from typing import Any, List, Sequence, Tuple
+from deepeval import evaluate
+from metrics.base import use_deepeval_base
+use_deepeval_base()
+from metrics.base import BaseMetric
+from metrics.custom_metrics import BuyerProfileAccuracyMetric, FormatComplianceMetric, ThemeStructureMetric
+from metrics.minimal_metrics import MinimalFormatMetric, MinimalRelevanceMetric, MinimalLogicMetric
+from metrics.executor import executor_mode
+from metrics.memo import set_metric_memo
+from benchmarks.bench_keyword_matching import make_test_cases
+
+
+class SimulatedJudgeMetric(BaseMetric):
+    """Stands in for an LLM-as-judge metric: waits a fixed latency, then passes"""
+
+    def __init__(self, latency: float, threshold: float = 0.5):
+        self.latency = latency
+        self.threshold = threshold
+        self.evaluation_cost = 0
+
+    def _finish(self) -> float:
+        self.score = 1.0
+        self.success = True
+        self.reason = "Simulated judge"
+        return self.score
+
+    def measure(self, test_case: Any, *args, **kwargs) -> float:
+        time.sleep(self.latency)
+        return self._finish()
+
+    async def a_measure(self, test_case: Any, *args, **kwargs) -> float:
+        await asyncio.sleep(self.latency)
+        return self._finish()
+
+    def is_successful(self) -> bool:
+        return self.success
+
+    @property
+    def __name__(self):
+        return "Simulated Judge"
+
+
+def build_metrics(judge_latency: float) -> List[Any]:
+    return [
+        BuyerProfileAccuracyMetric(threshold=0.8),
+        FormatComplianceMetric(threshold=1.0),
+        ThemeStructureMetric(threshold=0.7),
+        MinimalFormatMetric(threshold=1.0),
+        MinimalRelevanceMetric(threshold=0.7),
+        MinimalLogicMetric(threshold=0.6),
+        SimulatedJudgeMetric(judge_latency)
+    ]
+
+
+Result = Tuple[str, float, bool, str]
+
+
+def run_sync(test_cases: Sequence[Any], metrics: Sequence[Any]) -> List[List[Result]]:
+    results = []
+    for test_case in test_cases:
+        case_results = []
+        for metric in metrics:
+            score = metric.measure(test_case)
+            case_results.append((metric.__name__, score, metric.is_successful(), metric.reason))
+        results.append(case_results)
+    return results
+
+
+async def run_async(test_cases: Sequence[Any], metrics: Sequence[Any], concurrency: int) -> List[List[Result]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def score_case(test_case: Any) -> List[Result]:
+        # Metrics keep per-case state, so each case scores with its own copies, as evaluate() does
+        case_metrics = [copy.copy(metric) for metric in metrics]
+        async with semaphore:
+            scores = await asyncio.gather(*(metric.a_measure(test_case) for metric in case_metrics))
+        return [
+            (metric.__name__, score, metric.is_successful(), metric.reason)
+            for metric, score in zip(case_metrics, scores)
+        ]
+
+    return list(await asyncio.gather(*(score_case(test_case) for test_case in test_cases)))
+
+
+def run_evaluate(test_cases: Sequence[Any], metrics: Sequence[Any], run_async_mode: bool, concurrency: int) -> None:
+    """deepeval evaluate() with async execution on or off, without console output"""
+    try:
+        from deepeval.evaluate import AsyncConfig, DisplayConfig
+    except ImportError:
+        # Older deepeval releases take these as keyword arguments
+        evaluate(test_cases=list(test_cases), metrics=list(metrics), run_async=run_async_mode,
+                 show_indicator=False, print_results=False)
+        return
+    evaluate(test_cases=list(test_cases), metrics=list(metrics),
+             async_config=AsyncConfig(run_async=run_async_mode, max_concurrent=concurrency),
+             display_config=DisplayConfig(show_indicator=False, print_results=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=3000, help="Synthetic test cases")
+    parser.add_argument("--judge-latency", type=float, default=0.01, help="Seconds per simulated judge evaluation")
+    parser.add_argument("--concurrency", type=int, default=100, help="Test cases scored concurrently on the async path")
+    parser.add_argument("--skip-evaluate", action="store_true", help="Only run the direct measure / a_measure comparison")
+    args = parser.parse_args()
+
+    # Time the scoring itself, not memo lookups
+    set_metric_memo(None)
+    metrics = build_metrics(args.judge_latency)
+    print(f"{args.cases} cases x {len(metrics)} metrics, judge latency {args.judge_latency * 1000:.0f} ms, "
+          f"executor {executor_mode()}, concurrency {args.concurrency}\n")
+
+    # Fresh test cases per path so neither benefits from the other's parsed outputs
+    start = time.perf_counter()
+    sync_results = run_sync(make_test_cases(args.cases), metrics)
+    sync_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async_results = asyncio.run(run_async(make_test_cases(args.cases), metrics, args.concurrency))
+    async_time = time.perf_counter() - start
+
+    if async_results != sync_results:
+        raise AssertionError("a_measure results differ from measure")
+
+    print(f"{'Path':<22} {'seconds':>9} {'case/s':>10} {'speedup':>9}")
+    print(f"{'measure loop':<22} {sync_time:>9.2f} {args.cases / sync_time:>10,.0f} {'1.0x':>9}")
+    print(f"{'a_measure gather':<22} {async_time:>9.2f} {args.cases / async_time:>10,.0f} {sync_time / async_time:>8.1f}x")
+    print("a_measure results identical to measure for all metrics")
+
+    if args.skip_evaluate:
+        return
+
+    timings = {}
+    for label, run_async_mode in (('evaluate() sync', False), ('evaluate() async', True)):
+        start = time.perf_counter()
+        run_evaluate(make_test_cases(args.cases), metrics, run_async_mode, args.concurrency)
+        timings[label] = time.perf_counter() - start
+
+    print(f"\n{'Path':<22} {'seconds':>9} {'case/s':>10} {'speedup':>9}")
+    base = timings['evaluate() sync']
+    for label, elapsed in timings.items():
+        print(f"{label:<22} {elapsed:>9.2f} {args.cases / elapsed:>10,.0f} {base / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Import-time benchmark for the metric, model and entry-point modules
+
+Each module is imported in a fresh interpreter, so results reflect cold
+startup as seen by CI and quick_check. Besides the time, every run records
+which heavy SDKs (deepeval, google.generativeai, dotenv) the import pulled
+in; a module expected to stay light that loads one fails the run, as does
+a slowdown beyond the threshold when comparing against a baseline.
+
+Usage:
+    python -m benchmarks.bench_import_time --output benchmarks/import_baseline.json
+    python -m benchmarks.bench_import_time --compare benchmarks/import_baseline.json [--threshold 0.5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from typing import Any, Dict, List
+
+
+HEAVY_MODULES = ('deepeval', 'google.generativeai', 'dotenv')
+
+# Module -> whether importing it must leave the heavy SDKs unloaded
+MODULES = {
+    'metrics.minimal_metrics': True,
+    'metrics.custom_metrics': True,
+    'pipeline.metric_runner': True,
+    'models.llm_integration': True,
+    'minimal_evaluate': True,
+    'simple_evaluate': True,
+    'evaluate': False,
+}
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def import_once(module: str) -> Dict[str, Any]:
+    """Import time (ms) and heavy modules loaded, measured in a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=os.getcwd(), check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_suite(repeats: int = 5) -> Dict[str, Any]:
+    results = {}
+    for module, light in MODULES.items():
+        try:
+            samples = [import_once(module) for _ in range(repeats)]
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<28} import failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        timings = [sample['ms'] for sample in samples]
+        heavy = samples[-1]['heavy']
+        results[module] = {'ms': statistics.median(timings), 'min_ms': min(timings), 'heavy': heavy, 'light': light}
+        print(f"{module:<28} {results[module]['ms']:>9.1f} ms  {', '.join(heavy) or '-'}")
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeats': repeats
+        },
+        'results': results
+    }
+
+
+def heavy_violations(current: Dict[str, Any]) -> List[str]:
+    """Modules expected to stay light that loaded a heavy SDK"""
+    return [module for module, result in current['results'].items() if result['light'] and result['heavy']]
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print current/baseline ratios and return the modules slower than 1 + threshold"""
+    regressions = []
+    print(f"\n{'Module':<28} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for module, result in current['results'].items():
+        base = baseline['results'].get(module)
+        if base is None:
+            print(f"{module:<28} {'-':>12} {result['ms']:>12.1f}     new")
+            continue
+        ratio = result['ms'] / base['ms']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(module)
+            flag = '  REGRESSION'
+        print(f"{module:<28} {base['ms']:>12.1f} {result['ms']:>12.1f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="Write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Allowed slowdown before a module is flagged (0.5 = 50%% slower)")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh-interpreter imports per module")
+    args = parser.parse_args()
+
+    current = run_suite(args.repeats)
+    failed = False
+
+    violations = heavy_violations(current)
+    if violations:
+        print(f"\nHeavy SDKs loaded at import by: {', '.join(violations)}")
+        failed = True
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(current, file, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} module(s) regressed by more than {args.threshold:.0%}")
+            failed = True
+        else:
+            print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Parity check and throughput benchmark for the rule-based metrics and their compiled keyword matchers
+
+Every rule-based metric's score and success are checked against a
+transcription of its original implementation (inline bullet parsing,
+regex symbol stripping, `keyword in text` loops) on synthetic test cases,
+and every KeywordMatcher's any_in against the `any(...)` check it replaced;
+any mismatch raises. Then per-case measure throughput is reported.
+
+Usage:
+    python -m benchmarks.bench_keyword_matching [num_cases]
+"""
+import re
+import sys
+import time
+import random
+from typing import Any, Callable, Dict, List, Tuple
+from deepeval.test_case import LLMTestCase
+from metrics.custom_metrics import BuyerProfileAccuracyMetric, FormatComplianceMetric, ThemeStructureMetric
+from metrics.keyword_matching import KeywordMatcher
+from metrics.minimal_metrics import MinimalFormatMetric, MinimalRelevanceMetric, MinimalLogicMetric
+from metrics.memo import set_metric_memo
+from metrics.parsing import parse_output
+
+
+WORDS = (
+    "yield investor rental returns income home family legacy owner lifestyle sqft unit spacious bedroom "
+    "view residence building amenities mrt location district walk mins excellent poor bad avoid risky "
+    "decline compact large waterfront market value price property investment asset freehold leasehold "
+    "efficient size towers premium central"
+).split()
+
+INPUTS = [
+    "Unit: 1200 sqft 2 Bedroom, Freehold, near MRT, water view",
+    "Unit: 750 sqft 2 Bedroom, 99-year leasehold, city view",
+    "Unit: 1500 sqft 3 Bedroom, Freehold, waterfront view",
+]
+
+
+def _baseline_bullets(lines: List[str]) -> List[str]:
+    bullet_lines = []
+    for line in lines:
+        if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+            bullet_lines.append(line)
+        elif len(line) > 10 and not line.endswith(':'):
+            bullet_lines.append(line)
+    if not bullet_lines:
+        bullet_lines = [line for line in lines if len(line) > 10]
+    return bullet_lines
+
+
+def _baseline_lines(text: str) -> List[str]:
+    return [line.strip() for line in text.strip().split('\n') if line.strip()]
+
+
+def baseline_buyer_profile(test_case: Any) -> float:
+    actual_output = test_case.actual_output.lower()
+    if "1200" in test_case.input or "1500" in test_case.input:
+        keywords = ["legacy", "owner", "occupier", "home", "family", "lifestyle"]
+    else:
+        keywords = ["yield", "investor", "rental", "returns", "income"]
+    return 1.0 if any(keyword in actual_output for keyword in keywords) else 0.0
+
+
+def baseline_format_compliance(test_case: Any) -> float:
+    bullet_lines = _baseline_bullets(_baseline_lines(test_case.actual_output))
+    char_scores = []
+    for bullet in bullet_lines:
+        char_count = len(re.sub(r'^[•\-\*]\s*', '', bullet))
+        char_scores.append(1.0 if char_count <= 80 else max(0.0, 1.0 - (char_count - 80) / 40))
+    avg_char_score = sum(char_scores) / len(char_scores) if char_scores else 0.0
+    components = [1.0 if len(bullet_lines) == 3 else 0.0, avg_char_score]
+    return sum(components) / len(components)
+
+
+def baseline_theme_structure(test_case: Any) -> float:
+    bullet_lines = _baseline_bullets(_baseline_lines(test_case.actual_output.lower()))
+    themes = [
+        ['sqft', 'spacious', 'bedroom', 'unit', 'space', 'layout', 'floor', 'view'],
+        ['residence', 'building', 'development', 'amenities', 'facilities', 'estate'],
+        ['mrt', 'location', 'district', 'neighborhood', 'area', 'mins', 'walk', 'proximity']
+    ]
+    theme_scores = []
+    for i, bullet in enumerate(bullet_lines):
+        if i < len(themes):
+            theme_scores.append(1.0 if any(keyword in bullet for keyword in themes[i]) else 0.5)
+        else:
+            theme_scores.append(0.5)
+    return sum(theme_scores) / len(theme_scores) if theme_scores else 0.0
+
+
+def baseline_minimal_format(test_case: Any) -> float:
+    bullet_lines = []
+    for line in _baseline_lines(test_case.actual_output):
+        if line.startswith(('•', '-', '*')):
+            bullet_lines.append(line)
+        elif len(line) > 20 and not line.endswith(':') and not line.startswith('**'):
+            bullet_lines.append(line)
+    char_scores = [1.0 if len(re.sub(r'^[•\-\*]\s*', '', bullet)) <= 80 else 0.0 for bullet in bullet_lines]
+    avg_char_score = sum(char_scores) / len(char_scores) if char_scores else 0.0
+    return ((1.0 if len(bullet_lines) == 3 else 0.0) + avg_char_score) / 2
+
+
+def baseline_minimal_relevance(test_case: Any) -> float:
+    # The original left specific_score unset (a NameError) without a specific term; 0.0 is what the metric uses
+    actual_output = test_case.actual_output.lower()
+    input_data = test_case.input.lower()
+    relevance_indicators = []
+    for term in ['sqft', 'bedroom', 'freehold', 'leasehold', 'mrt', 'view']:
+        if term in input_data and term in actual_output:
+            relevance_indicators.append(1)
+        elif term in input_data:
+            relevance_indicators.append(0)
+    investment_terms = ['investment', 'value', 'asset', 'price', 'market', 'property']
+    relevance_indicators.append(sum(1 for term in investment_terms if term in actual_output) / len(investment_terms))
+    specific_terms = ['waterfront', 'compact towers', 'premium towers', 'central district']
+    relevance_indicators.append(1.0 if any(term in actual_output for term in specific_terms) else 0.0)
+    return sum(relevance_indicators) / len(relevance_indicators)
+
+
+def baseline_minimal_logic(test_case: Any) -> float:
+    actual_output = test_case.actual_output.lower()
+    consistency_score = 1.0
+    if 'excellent' in actual_output and 'poor' in actual_output:
+        consistency_score -= 0.3
+    if '750' in test_case.input and ('spacious' in actual_output or 'large' in actual_output):
+        consistency_score -= 0.2
+    if '1500' in test_case.input and ('compact' in actual_output or 'efficient size' in actual_output):
+        consistency_score -= 0.2
+    negative_terms = ['avoid', 'poor', 'bad', 'risky', 'decline']
+    if sum(1 for term in negative_terms if term in actual_output) > 1:
+        consistency_score -= 0.2
+    return max(0.0, consistency_score)
+
+
+# Each metric, at the threshold the scripts use, with its original scoring
+BASELINES: List[Tuple[Any, Callable[[Any], float]]] = [
+    (BuyerProfileAccuracyMetric(threshold=0.8), baseline_buyer_profile),
+    (FormatComplianceMetric(threshold=1.0), baseline_format_compliance),
+    (ThemeStructureMetric(threshold=0.7), baseline_theme_structure),
+    (MinimalFormatMetric(threshold=1.0), baseline_minimal_format),
+    (MinimalRelevanceMetric(threshold=0.7), baseline_minimal_relevance),
+    (MinimalLogicMetric(threshold=0.6), baseline_minimal_logic)
+]
+
+
+def make_test_cases(num_cases: int, seed: int = 42):
+    """Deterministic synthetic test cases with mixed bullet styles and lengths"""
+    rng = random.Random(seed)
+    test_cases = []
+    for _ in range(num_cases):
+        lines = []
+        for _ in range(rng.randint(1, 6)):
+            prefix = rng.choice(['', '• ', '- ', '* ', '** '])
+            body = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 20)))
+            lines.append(prefix + body + rng.choice(['', '', ':']))
+        test_cases.append(LLMTestCase(input=rng.choice(INPUTS), actual_output='\n'.join(lines)))
+    return test_cases
+
+
+def matchers_and_texts(test_cases: List[Any]) -> List[Tuple[str, KeywordMatcher, List[str]]]:
+    """Each metric's matchers with the texts measure scans them against"""
+    outputs = [parse_output(test_case).lower for test_case in test_cases]
+    bullets = [bullet for test_case in test_cases for bullet in parse_output(test_case).lower_bullets]
+    inputs = [test_case.input.lower() for test_case in test_cases]
+    return [
+        ('buyer investor', BuyerProfileAccuracyMetric.investor_keywords, outputs),
+        ('buyer owner', BuyerProfileAccuracyMetric.owner_keywords, outputs),
+        *((f'theme {i + 1}', matcher, bullets) for i, matcher in enumerate(ThemeStructureMetric.theme_keywords)),
+        ('relevance input', MinimalRelevanceMetric.input_keywords, inputs),
+        ('relevance output', MinimalRelevanceMetric.output_keywords, outputs),
+        ('logic', MinimalLogicMetric.logic_keywords, outputs)
+    ]
+
+
+def check_parity(test_cases: List[Any]) -> Dict[str, int]:
+    """
+    Raise AssertionError where a metric or matcher disagrees with the original logic
+
+    Returns the number of passing cases per metric class, to show the
+    synthetic cases exercise both outcomes.
+    """
+    for label, matcher, texts in matchers_and_texts(test_cases):
+        for text in texts:
+            if matcher.any_in(text) != any(keyword in text for keyword in matcher.keywords):
+                raise AssertionError(f"{label}: compiled matching differs from substring checks on {text!r}")
+
+    passed = {}
+    for metric, baseline in BASELINES:
+        passed[type(metric).__name__] = 0
+        for test_case in test_cases:
+            score = metric.measure(test_case)
+            expected = baseline(test_case)
+            if score != expected or metric.success != (expected >= metric.threshold):
+                raise AssertionError(f"{type(metric).__name__}: scored {score} ({metric.success}), original logic "
+                                     f"{expected} on input {test_case.input!r}, output {test_case.actual_output!r}")
+            passed[type(metric).__name__] += metric.success
+    return passed
+
+
+def main(num_cases: int = 20000):
+    # Time the scoring itself, not memo lookups
+    set_metric_memo(None)
+
+    passed = check_parity(make_test_cases(num_cases))
+    print(f"Scores, success and keyword matches identical to the original logic on {num_cases} cases")
+    print(', '.join(f"{name}: {count} passed" for name, count in passed.items()) + "\n")
+
+    metrics = [metric for metric, _ in BASELINES]
+
+    print(f"{'Metric':<28} {'measure (case/s)':>18}")
+    for metric in metrics:
+        # Fresh test cases per metric so none benefits from another's parsed outputs
+        test_cases = make_test_cases(num_cases)
+        start = time.perf_counter()
+        for test_case in test_cases:
+            metric.measure(test_case)
+        elapsed = time.perf_counter() - start
+        print(f"{type(metric).__name__:<28} {num_cases / elapsed:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,65 @@
+"""
+Packed vs unpacked prompt benchmark: prompt tokens per scenario and scenarios per minute
+
+Without --live only the prompts are built, so requests and estimated prompt
+tokens per scenario are compared offline. With --live every mode calls the
+Gemini API (cache and dedup off, so every scenario is generated) and also
+reports throughput and fallbacks.
+
+Usage:
+    python -m benchmarks.bench_packed_prompts [num_scenarios] [--pack-sizes 1,3,5,10] [--live]
+"""
+import time
+import argparse
+from data.test_data import MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO
+from models.prompt_registry import get_registry
+from models.packed_prompts import pack_prompt
+from models.payload_format import serialize_payload
+from models.rate_limiter import estimate_tokens
+
+
+PAYLOADS = [MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO]
+
+
+def prompt_tokens(data_payloads, pack_size: int):
+    """Requests sent and estimated prompt tokens for one pass over the payloads"""
+    template = get_registry().get()
+    if pack_size <= 1:
+        prompts = [template.render(serialize_payload(data_payload)) for data_payload in data_payloads]
+    else:
+        prompts = [pack_prompt(template, data_payloads[start:start + pack_size])
+                   for start in range(0, len(data_payloads), pack_size)]
+    return len(prompts), sum(estimate_tokens(prompt) for prompt in prompts)
+
+
+def main(num_scenarios: int = 30, pack_sizes=(1, 3, 5, 10), live: bool = False):
+    data_payloads = [PAYLOADS[index % len(PAYLOADS)] for index in range(num_scenarios)]
+
+    header = f"{'pack size':>9} {'requests':>9} {'~prompt tokens/scenario':>24}"
+    if live:
+        header += f" {'scenarios/min':>14} {'fallbacks':>10}"
+    print(header)
+
+    for pack_size in pack_sizes:
+        requests, tokens = prompt_tokens(data_payloads, pack_size)
+        line = f"{pack_size:>9} {requests:>9} {tokens / num_scenarios:>24,.0f}"
+
+        if live:
+            from models.llm_integration import GeminiModel
+            # The bundled payloads repeat, so dedup would generate only a few of them
+            gemini_model = GeminiModel(use_cache=False, pack_size=pack_size, dedup=False)
+            start = time.perf_counter()
+            gemini_model.generate_for_payloads(data_payloads)
+            elapsed = time.perf_counter() - start
+            line += f" {num_scenarios / elapsed * 60:>14,.1f} {gemini_model.pack_stats['fallbacks']:>10}"
+
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("num_scenarios", nargs="?", type=int, default=30)
+    parser.add_argument("--pack-sizes", default="1,3,5,10", help="Comma-separated pack sizes to compare")
+    parser.add_argument("--live", action="store_true", help="Call the Gemini API and measure throughput")
+    args = parser.parse_args()
+    main(args.num_scenarios, [int(size) for size in args.pack_sizes.split(',')], args.live)
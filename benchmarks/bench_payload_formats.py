@@ -0,0 +1,111 @@
+"""
+Payload serialization benchmark: prompt tokens, generation latency and metric scores per format
+
+Without --live only the prompts are built, so estimated prompt tokens per
+scenario are compared offline. With --live every format generates the same
+scenarios against the Gemini API (cache and dedup off, so every scenario is
+its own call) and reports the prompt
+tokens billed, generation latency and mean metric scores side by side, so a
+token saving can be checked for unchanged quality.
+
+Usage:
+    python -m benchmarks.bench_payload_formats [num_scenarios] [--formats json,compact,abbreviated,tabular]
+        [--listings N --transactions N] [--live]
+"""
+import time
+import argparse
+from data.test_data import MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO
+from models.payload_format import PAYLOAD_FORMATS
+from models.rate_limiter import estimate_tokens
+
+
+PAYLOADS = [MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO]
+
+
+def scenario_payloads(num_scenarios: int, listings: int = 0, transactions: int = 0):
+    """The bundled payloads, or synthetic ones with longer market context lists"""
+    if listings or transactions:
+        from data.synthetic_scenarios import generate_scenarios
+        return [scenario["data"] for scenario in
+                generate_scenarios(num_scenarios, listings=listings or 3, transactions=transactions or 3)]
+    return [PAYLOADS[index % len(PAYLOADS)] for index in range(num_scenarios)]
+
+
+def live_run(data_payloads, test_inputs, payload_format: str):
+    """Generate with one format; returns billed prompt tokens, latency and per-metric mean scores"""
+    from deepeval.test_case import LLMTestCase
+    from models.llm_integration import GeminiModel
+    from metrics.custom_metrics import BuyerProfileAccuracyMetric, FormatComplianceMetric, ThemeStructureMetric
+    from metrics.minimal_metrics import MinimalRelevanceMetric, MinimalLogicMetric
+
+    # The bundled payloads repeat, so dedup would generate only a few of them
+    gemini_model = GeminiModel(use_cache=False, pack_size=1, payload_format=payload_format, dedup=False)
+    start = time.perf_counter()
+    outputs = gemini_model.generate_for_payloads(data_payloads, prompts=test_inputs)
+    elapsed = time.perf_counter() - start
+
+    # MinimalFormatMetric is left out: it scores the same bullet rules as FormatComplianceMetric
+    metrics = [BuyerProfileAccuracyMetric(threshold=0.8), FormatComplianceMetric(threshold=1.0),
+               ThemeStructureMetric(threshold=0.7), MinimalRelevanceMetric(threshold=0.7),
+               MinimalLogicMetric(threshold=0.6)]
+    test_cases = [LLMTestCase(input=test_input, actual_output=output)
+                  for test_input, output in zip(test_inputs, outputs)]
+    scores = {
+        metric.__name__: sum(metric.measure(test_case) for test_case in test_cases) / len(test_cases)
+        for metric in metrics
+    }
+
+    return {
+        'prompt_tokens': gemini_model.usage.total.prompt_tokens / len(data_payloads),
+        'p50': gemini_model.latency.stats()['p50'],
+        'elapsed': elapsed,
+        'scores': scores
+    }
+
+
+def main(num_scenarios: int = 12, payload_formats=PAYLOAD_FORMATS, listings: int = 0, transactions: int = 0,
+         live: bool = False):
+    from models.llm_integration import create_test_input
+
+    data_payloads = scenario_payloads(num_scenarios, listings, transactions)
+    baseline = None
+    rows = []
+
+    for payload_format in payload_formats:
+        test_inputs = [create_test_input(data_payload, payload_format=payload_format) for data_payload in data_payloads]
+        tokens = sum(estimate_tokens(test_input) for test_input in test_inputs) / num_scenarios
+        baseline = baseline or tokens
+        row = {'format': payload_format, 'tokens': tokens, 'saved': 1 - tokens / baseline}
+        if live:
+            row.update(live_run(data_payloads, test_inputs, payload_format))
+        rows.append(row)
+
+    header = f"{'format':<12} {'~prompt tokens/scenario':>24} {'saved':>7}"
+    if live:
+        header += f" {'billed prompt tokens':>21} {'p50 s':>7} {'total s':>8}"
+    print(header)
+    for row in rows:
+        line = f"{row['format']:<12} {row['tokens']:>24,.0f} {row['saved']:>7.1%}"
+        if live:
+            # No p50 when no call completed
+            p50 = f"{row['p50']:.2f}" if row['p50'] is not None else '-'
+            line += f" {row['prompt_tokens']:>21,.0f} {p50:>7} {row['elapsed']:>8.2f}"
+        print(line)
+
+    if live:
+        metric_names = list(rows[0]['scores'])
+        print(f"\n{'format':<12} " + ' '.join(f"{name:>24}" for name in metric_names))
+        for row in rows:
+            print(f"{row['format']:<12} " + ' '.join(f"{row['scores'][name]:>24.2f}" for name in metric_names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("num_scenarios", nargs="?", type=int, default=12)
+    parser.add_argument("--formats", default=','.join(PAYLOAD_FORMATS),
+                        help="Comma-separated payload formats to compare; the first is the baseline for 'saved'")
+    parser.add_argument("--listings", type=int, default=0, help="Use synthetic payloads with this many competitive listings")
+    parser.add_argument("--transactions", type=int, default=0, help="Use synthetic payloads with this many past transactions")
+    parser.add_argument("--live", action="store_true", help="Call the Gemini API and compare latency and metric scores")
+    args = parser.parse_args()
+    main(args.num_scenarios, args.formats.split(','), args.listings, args.transactions, args.live)
@@ -0,0 +1,237 @@
+"""
+Micro-benchmark suite for metrics, bullet parsing and prompt rendering
+
+Every benchmark runs on fixed synthetic outputs, so results are comparable
+across commits on the same machine. Write a baseline, then compare a later
+run against it; regressions beyond the threshold exit with status 1.
+Comparisons use the fastest repeat of each benchmark, which is the least
+affected by scheduler and frequency noise; the median is reported as well.
+
+Usage:
+    python -m benchmarks.bench_suite --output benchmarks/baseline.json
+    python -m benchmarks.bench_suite --compare benchmarks/baseline.json [--threshold 0.5] [--repeats 15]
+"""
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+from typing import Any, Callable, Dict, List
+from deepeval.test_case import LLMTestCase
+from metrics.custom_metrics import BuyerProfileAccuracyMetric, FormatComplianceMetric, ThemeStructureMetric
+from metrics.minimal_metrics import MinimalFormatMetric, MinimalRelevanceMetric, MinimalLogicMetric
+from metrics.parsing import ParsedOutput
+from metrics.memo import set_metric_memo
+from models.llm_integration import create_test_input, load_prompt_template
+from data.test_data import MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO
+
+
+# Output shapes the model produces in practice, from compliant to rambling
+OUTPUTS = {
+    'compliant': (
+        "• Its 1200 sqft layout offers space newer, smaller units cannot match.\n"
+        "• A mature freehold project with proven price resilience and value.\n"
+        "• Walk 5 mins to the MRT from a waterfront residence with sea views."
+    ),
+    'headers': (
+        "**Buyer Profile:** Legacy/Owner-Occupier\n\n"
+        "Investment Theses:\n"
+        "- Rare 1500 sqft family home in a district dominated by compact units\n"
+        "- Freehold tenure secures long-term asset value for the next generation\n"
+        "- Excellent location near top schools and the upcoming MRT line"
+    ),
+    'plain': (
+        "This 750 sqft unit suits a yield investor seeking rental returns. The compact size matches "
+        "market demand, and the location near the MRT supports occupancy. Avoid overpaying: "
+        "competing listings show price pressure on larger units in this building."
+    ),
+    'verbose': '\n'.join(
+        f"* Point {index}: the spacious unit and mature building amenities give strong investment "
+        f"returns for family buyers, with a location within walking mins of the MRT station"
+        for index in range(12)
+    ),
+    'large': '\n'.join(
+        ("- " if index % 3 else "") + "yield rental home family legacy sqft unit view district "
+        "location price " * (1 + index % 5)
+        for index in range(200)
+    ),
+}
+
+PAYLOADS = [MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO]
+
+METRICS = [
+    BuyerProfileAccuracyMetric(threshold=0.8),
+    FormatComplianceMetric(threshold=1.0),
+    ThemeStructureMetric(threshold=0.7),
+    MinimalFormatMetric(threshold=1.0),
+    MinimalRelevanceMetric(threshold=0.7),
+    MinimalLogicMetric(threshold=0.6),
+]
+
+
+def sample_ns_per_op(fn: Callable[..., Any], setup: Callable[[], Any] = None, ops: int = 1000) -> float:
+    """
+    Nanoseconds per operation of one timed run of fn
+
+    setup, if given, builds fresh arguments outside the timed region; fn then
+    receives them and must perform ops operations. The garbage collector is
+    paused while timing, as timeit does, so a collection triggered by setup's
+    allocations is not charged to fn.
+    """
+    args = setup() if setup is not None else None
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        if setup is not None:
+            fn(args)
+        else:
+            fn()
+        return (time.perf_counter_ns() - start) / ops
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def metric_benchmarks(ops: int) -> Dict[str, Callable[[], float]]:
+    inputs = [create_test_input(payload) for payload in PAYLOADS]
+    benchmarks = {}
+
+    for metric in METRICS:
+        for shape, text in OUTPUTS.items():
+            # Fresh test cases per repeat so the parse-once memo does not hide parsing cost
+            def setup(text=text):
+                return [LLMTestCase(input=inputs[index % len(inputs)], actual_output=text) for index in range(ops)]
+
+            def run(test_cases, metric=metric):
+                for test_case in test_cases:
+                    metric.measure(test_case)
+
+            benchmarks[f"measure/{type(metric).__name__}/{shape}"] = (
+                lambda run=run, setup=setup: sample_ns_per_op(run, setup, ops))
+
+    return benchmarks
+
+
+def parsing_benchmarks(ops: int) -> Dict[str, Callable[[], float]]:
+    benchmarks = {}
+    for shape, text in OUTPUTS.items():
+        # Bullet extraction as done by analyze_single_scenario
+        def run(text=text):
+            for _ in range(ops):
+                ParsedOutput(text).extract_bullets(min_length=10, fallback=False)
+
+        benchmarks[f"extract_bullets/{shape}"] = lambda run=run: sample_ns_per_op(run, ops=ops)
+    return benchmarks
+
+
+def prompt_benchmarks(ops: int) -> Dict[str, Callable[[], float]]:
+    def render():
+        for index in range(ops):
+            create_test_input(PAYLOADS[index % len(PAYLOADS)])
+
+    def load():
+        for _ in range(ops):
+            load_prompt_template()
+
+    return {
+        'create_test_input': lambda: sample_ns_per_op(render, ops=ops),
+        'load_prompt_template': lambda: sample_ns_per_op(load, ops=ops),
+    }
+
+
+def run_suite(ops: int = 1000, name_filter: str = '', repeats: int = 15) -> Dict[str, Any]:
+    """
+    Median and minimum nanoseconds per operation of every benchmark over repeats
+
+    Repeats run in rounds over the whole suite rather than back to back, so a
+    slow stretch of the machine costs each benchmark one sample instead of all.
+    """
+    # Repeats score identical outputs, which the metric memo would turn into lookups
+    set_metric_memo(None)
+
+    benchmarks = {}
+    for group in (metric_benchmarks, parsing_benchmarks, prompt_benchmarks):
+        benchmarks.update(group(ops))
+    benchmarks = {name: benchmark for name, benchmark in benchmarks.items() if name_filter in name}
+
+    samples: Dict[str, List[float]] = {name: [] for name in benchmarks}
+    for _ in range(repeats):
+        for name, benchmark in benchmarks.items():
+            samples[name].append(benchmark())
+
+    results = {}
+    for name, values in samples.items():
+        results[name] = {'ns_per_op': statistics.median(values), 'min_ns_per_op': min(values), 'ops': ops}
+        print(f"{name:<52} {results[name]['min_ns_per_op'] / 1000:>10.2f} us/op min "
+              f"{results[name]['ns_per_op'] / 1000:>10.2f} median")
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'ops': ops,
+            'repeats': repeats
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print current/baseline ratios of the fastest repeat and return the names slower than 1 + threshold
+
+    Medians shift with background load and flag false regressions; the minimum
+    is what the code costs when nothing interferes.
+    """
+    regressions = []
+    print(f"\n{'Benchmark':<52} {'baseline us':>12} {'current us':>12} {'ratio':>7}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<52} {'-':>12} {result['min_ns_per_op'] / 1000:>12.2f}     new")
+            continue
+        ratio = result['min_ns_per_op'] / base['min_ns_per_op']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<52} {base['min_ns_per_op'] / 1000:>12.2f} {result['min_ns_per_op'] / 1000:>12.2f} "
+              f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for metrics, parsing and prompt rendering")
+    parser.add_argument("--output", help="Write results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Allowed slowdown before a benchmark is flagged (0.5 = 50%% slower)")
+    parser.add_argument("--ops", type=int, default=1000, help="Operations per timed repeat")
+    parser.add_argument("--repeats", type=int, default=15, help="Timed repeats per benchmark; the fastest is compared")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    current = run_suite(args.ops, args.filter, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(current, file, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Streaming scenario source for large JSONL corpora
+"""
+import io
+import gzip
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Scenarios generated per wave when streaming a corpus through the model
+DEFAULT_BATCH_SIZE = 64
+
+
+def open_text(path: str) -> io.TextIOBase:
+    """Open a plain, gzip (.gz) or zstandard (.zst/.zstd) compressed text file for streaming"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+
+    if path.endswith(('.zst', '.zstd')):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst scenario files requires the 'zstandard' package")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    return open(path, 'r', encoding='utf-8')
+
+
+def parse_line_range(line_range: Optional[str]) -> Tuple[int, Optional[int]]:
+    """Parse a 'start:stop' shard spec (0-based, stop exclusive, either side optional)"""
+    if not line_range:
+        return 0, None
+    start, _, stop = line_range.partition(':')
+    return int(start or 0), int(stop) if stop else None
+
+
+def to_scenario(record: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+    """
+    Normalize a JSONL record into a scenario dict with 'name' and 'data'
+
+    A record is either a bare payload (with unitData, projectData, ...) or an
+    envelope {"name": ..., "data": {...}, ...} whose extra keys such as
+    expected_profile are kept.
+    """
+    if 'data' in record and 'unitData' not in record:
+        scenario = dict(record)
+    else:
+        scenario = {'data': record}
+
+    if not scenario.get('name'):
+        project_name = scenario['data'].get('projectData', {}).get('name')
+        scenario['name'] = f"{project_name or 'Scenario'} (line {line_number})"
+
+    return scenario
+
+
+def iter_scenarios(path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield scenarios from a JSONL file, one line at a time
+
+    Args:
+        path: JSONL file, optionally .gz or .zst compressed
+        start: First line to read (0-based), for sharding a corpus across runs
+        stop: Line to stop before, or None to read to the end
+
+    Yields:
+        Scenario dicts with at least 'name' and 'data'
+    """
+    with open_text(path) as file:
+        for line_number, line in enumerate(islice(file, start, stop), start):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number + 1}: invalid JSON ({e})")
+            yield to_scenario(record, line_number + 1)
+
+
+def batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items without materializing it"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,195 @@
+"""
+Seeded synthetic scenario generator for throughput and memory testing
+
+Payloads follow the schema of data/test_data.py. Numeric fields are drawn in
+bulk with NumPy, one chunk of scenarios at a time, so corpora of any size
+stream to JSONL in constant memory.
+
+Usage:
+    python -m data.synthetic_scenarios scenarios.jsonl.gz --count 100000 --listings 1000 --transactions 500
+"""
+import gzip
+import json
+import argparse
+from typing import Any, Dict, Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+NAME_PREFIXES = ("Waterfront", "Compact", "Premium", "Marina", "Garden", "Skyline", "Harbour", "Orchard",
+                 "Parkview", "Riverside", "Emerald", "Summit")
+NAME_SUFFIXES = ("Residences", "Towers", "Suites", "Heights", "Court", "Gardens", "Lofts", "Place")
+NEIGHBORHOODS = ("Central District", "Business District", "Financial District", "East Coast", "West Coast",
+                 "Northern Heights", "Riverside", "Garden Precinct")
+ORIENTATIONS = ("Unblocked water view", "City view", "Waterfront view", "Pool view", "Garden view",
+                "Facing inner courtyard")
+TENURES = ("Freehold", "99-year leasehold", "999-year leasehold")
+AMENITIES = ("Swimming Pool", "Gym", "BBQ Area", "Sky Gardens", "Multi-purpose Hall", "Infinity Pool",
+             "Private Dining", "Concierge Service", "Tennis Court", "Playground")
+POI_TYPES = ("METRO", "FOOD", "ENTERTAINMENT", "SCHOOL", "MALL", "PARK")
+STACKS = tuple("ABCDEFGH")
+
+# Market shape: most listings are compact units that trade fast; large units
+# sit longer at a lower psf, the pattern the analysis prompt looks for
+COMPACT_SHARE = 0.7
+COMPACT_SQFT = (770, 40)
+LARGE_SQFT = (1300, 150)
+COMPACT_PSF = (2100, 80)
+LARGE_PSF = (1980, 90)
+COMPACT_DAYS_MEAN = 30
+LARGE_DAYS_MEAN = 110
+LATEST_SALE_DATE = '2025-07-31'
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("The synthetic scenario generator requires the 'numpy' package")
+
+
+def _draw_units(rng, shape, large=None):
+    """Bulk sqft / psf / days-on-market for a mix of compact and large units"""
+    if large is None:
+        large = rng.random(shape) >= COMPACT_SHARE
+    sqft = np.where(large, rng.normal(*LARGE_SQFT, shape), rng.normal(*COMPACT_SQFT, shape))
+    psf = np.where(large, rng.normal(*LARGE_PSF, shape), rng.normal(*COMPACT_PSF, shape))
+    days = rng.exponential(np.where(large, LARGE_DAYS_MEAN, COMPACT_DAYS_MEAN), shape)
+    return large, np.maximum(sqft, 400).round(-1), np.maximum(psf, 800).round(-1), days.astype(int) + 1
+
+
+def _config(sqft: int) -> str:
+    if sqft < 650:
+        return "1 Bedroom"
+    if sqft < 1000:
+        return "2 Bedroom"
+    if sqft < 1400:
+        return "3 Bedroom"
+    return "4 Bedroom"
+
+
+def generate_scenarios(count: int, seed: int = 0, listings: int = 3, transactions: int = 3,
+                       chunk_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Yield count scenario envelopes {"name", "data", "expected_profile"}
+
+    Args:
+        count: Number of scenarios
+        seed: Seed for numpy.random.default_rng; the same arguments give the same corpus
+        listings: Length of each marketContext.competitiveListings
+        transactions: Length of each marketContext.pastTransactions
+        chunk_size: Scenarios drawn per bulk NumPy call; bounds memory for long lists
+    """
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    latest_sale = np.datetime64(LATEST_SALE_DATE)
+
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+
+        # Subject unit, one per scenario
+        large, sqft, psf, _ = _draw_units(rng, size, large=rng.random(size) >= 0.5)
+        floors = rng.integers(2, 41, size)
+        stacks = rng.integers(0, len(STACKS), size)
+        orientations = rng.integers(0, len(ORIENTATIONS), size)
+        prefixes = rng.integers(0, len(NAME_PREFIXES), size)
+        suffixes = rng.integers(0, len(NAME_SUFFIXES), size)
+        neighborhoods = rng.integers(0, len(NEIGHBORHOODS), size)
+        completion_years = rng.integers(1995, 2025, size)
+        tenures = rng.integers(0, len(TENURES), size)
+        amenity_masks = rng.random((size, len(AMENITIES))) < 0.35
+        poi_types = rng.integers(0, len(POI_TYPES), (size, 2))
+        poi_minutes = rng.integers(1, 16, (size, 2))
+
+        # Market context, drawn as (scenarios, list length) matrices
+        _, listing_sqft, listing_psf, listing_days = _draw_units(rng, (size, listings))
+        _, sale_sqft, sale_psf, _ = _draw_units(rng, (size, transactions))
+        sale_dates = (latest_sale - rng.integers(0, 365, (size, transactions))).astype(str)
+
+        # Convert to Python scalars in bulk rather than element by element
+        large, sqft, psf = large.tolist(), sqft.astype(int).tolist(), psf.tolist()
+        floors, stacks, orientations = floors.tolist(), stacks.tolist(), orientations.tolist()
+        prefixes, suffixes, neighborhoods = prefixes.tolist(), suffixes.tolist(), neighborhoods.tolist()
+        completion_years, tenures = completion_years.tolist(), tenures.tolist()
+        amenity_masks, poi_types, poi_minutes = amenity_masks.tolist(), poi_types.tolist(), poi_minutes.tolist()
+        listing_sqft, listing_psf = listing_sqft.astype(int).tolist(), listing_psf.astype(int).tolist()
+        listing_days = listing_days.tolist()
+        sale_sqft, sale_psf, sale_dates = sale_sqft.astype(int).tolist(), sale_psf.astype(int).tolist(), sale_dates.tolist()
+
+        for i in range(size):
+            name = f"{NAME_PREFIXES[prefixes[i]]} {NAME_SUFFIXES[suffixes[i]]}"
+            data = {
+                "unitData": {
+                    "address": f"{floors[i]:02d}-{stacks[i] + 1:02d}, {name}",
+                    "floor": floors[i],
+                    "stack": STACKS[stacks[i]],
+                    "sqft": sqft[i],
+                    "config": _config(sqft[i]),
+                    "orientation": ORIENTATIONS[orientations[i]]
+                },
+                "pricingData": {
+                    "currentListing": {
+                        "askingPrice": int(round(sqft[i] * psf[i], -4))
+                    }
+                },
+                "projectData": {
+                    "name": name,
+                    "neighborhood": NEIGHBORHOODS[neighborhoods[i]],
+                    "completionYear": completion_years[i],
+                    "tenure": TENURES[tenures[i]],
+                    "amenities": [amenity for amenity, chosen in zip(AMENITIES, amenity_masks[i]) if chosen],
+                    "pois": [
+                        {
+                            "name": f"{NEIGHBORHOODS[neighborhoods[i]]} {POI_TYPES[poi_type].title()}",
+                            "type": POI_TYPES[poi_type],
+                            "walkingDurationMins": minutes
+                        }
+                        for poi_type, minutes in zip(poi_types[i], poi_minutes[i])
+                    ]
+                },
+                "marketContext": {
+                    "competitiveListings": [
+                        {"sqft": s, "askingPsf": p, "daysOnMarket": d}
+                        for s, p, d in zip(listing_sqft[i], listing_psf[i], listing_days[i])
+                    ],
+                    "pastTransactions": [
+                        {"sqft": s, "transactedPsf": p, "saleDate": d}
+                        for s, p, d in zip(sale_sqft[i], sale_psf[i], sale_dates[i])
+                    ]
+                }
+            }
+            yield {
+                "name": f"{name} #{start + i + 1}",
+                "data": data,
+                "expected_profile": "legacy_owner_occupier" if large[i] else "yield_investor"
+            }
+
+
+def write_jsonl(path: str, count: int, seed: int = 0, listings: int = 3, transactions: int = 3) -> int:
+    """Stream a generated corpus to a JSONL file (gzip when path ends in .gz); returns the count written"""
+    if path.endswith('.gz'):
+        # Fast compression: at the default level 9, gzip takes most of the run time
+        file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=1)
+    else:
+        file = open(path, 'w', encoding='utf-8')
+
+    written = 0
+    with file:
+        for scenario in generate_scenarios(count, seed, listings, transactions):
+            file.write(json.dumps(scenario, separators=(',', ':')) + '\n')
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic scenario corpus as JSONL")
+    parser.add_argument("path", help="Output file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--count", type=int, default=1000, help="Number of scenarios")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--listings", type=int, default=3, help="Competitive listings per scenario")
+    parser.add_argument("--transactions", type=int, default=3, help="Past transactions per scenario")
+    args = parser.parse_args()
+
+    written = write_jsonl(args.path, args.count, args.seed, args.listings, args.transactions)
+    print(f"Wrote {written} scenarios to {args.path}")
@@ -2,25 +2,38 @@
 Main evaluation script for real estate analysis prompt testing
 """
 import json
+import argparse
 from deepeval import evaluate
 from deepeval.test_case import LLMTestCase
+# deepeval's evaluate() needs metrics built on its BaseMetric, so request it before importing them
+from metrics.base import use_deepeval_base
+use_deepeval_base()
 # Import custom components
-from models.llm_integration import GeminiModel, load_prompt_template, create_test_input
+from models.llm_integration import get_gemini_model, create_test_input, load_env, print_generation_stats
 from metrics.custom_metrics import BuyerProfileAccuracyMetric, FormatComplianceMetric, ThemeStructureMetric
+from metrics.parsing import ParsedOutput
+from metrics.memo import get_metric_memo
 from data.test_data import MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO
+from data.scenario_loader import DEFAULT_BATCH_SIZE, iter_scenarios, parse_line_range
+from pipeline import tracing
+from pipeline.budget import BudgetScheduler, RunBudget, budget_from_env, generate_within_budget
 
 
-def create_test_cases():
-    """Create test cases for evaluation"""
+def create_test_cases(scenarios=None, budget=None):
+    """
+    Create test cases for evaluation, optionally from a streamed scenario iterable
+    
+    With a limited budget, scenarios run by descending 'priority' and generation
+    stops cleanly before the budget would be exceeded.
+    """
     
     # Initialize the model
-    gemini_model = GeminiModel()
-    prompt_template = load_prompt_template()
+    gemini_model = get_gemini_model()
     
     test_cases = []
     
     # Test scenarios with expected outcomes
-    scenarios = [
+    scenarios = scenarios if scenarios is not None else [
         {
             "name": "Marina Bay - Legacy Buyer",
             "data": MARINA_BAY_DATA,
@@ -41,43 +54,54 @@ def create_test_cases():
         }
     ]
     
-    for scenario in scenarios:
-        # Create input
-        test_input = create_test_input(scenario["data"])
+    scheduler = BudgetScheduler(budget or RunBudget(), DEFAULT_BATCH_SIZE)
+    
+    # Scenarios may be a lazy stream, so generate them in bounded batches
+    for batch in scheduler.batches(scenarios):
+        # The single-scenario prompt is the test case input and, unpacked, the request sent to the model
+        test_inputs = [create_test_input(scenario["data"], payload_format=gemini_model.payload_format) for scenario in batch]
         
-        # Generate output
-        actual_output = gemini_model.generate_response(prompt_template, scenario["data"])
+        # Generate the batch concurrently (packed when GEMINI_PACK_SIZE > 1), results come back in scenario order
+        with tracing.span('run.generate'):
+            outputs = gemini_model.generate_for_payloads([scenario["data"] for scenario in batch], prompts=test_inputs)
+        scheduler.record(gemini_model.last_usage)
         
-        # Create expected output (simplified for demo)
-        expected_output = f"""Expected analysis for {scenario['expected_profile']} with {scenario['expected_challenge']} challenge.
+        for scenario, test_input, actual_output, usage in zip(batch, test_inputs, outputs, gemini_model.last_usage):
+            # Create expected output (simplified for demo)
+            expected_output = f"""Expected analysis for {scenario.get('expected_profile', 'unspecified')} with {scenario.get('expected_challenge', 'unspecified')} challenge.
         Should contain 3 bullet points under 80 characters each following Unit-Project-Location structure."""
-        
-        # Create test case
-        test_case = LLMTestCase(
-            input=test_input,
-            actual_output=actual_output,
-            expected_output=expected_output,
-            context=[json.dumps(scenario["data"])]
-        )
-        
-        test_cases.append(test_case)
-        
-        # Print the generated output for review
-        print(f"\n{'='*50}")
-        print(f"Scenario: {scenario['name']}")
-        print(f"{'='*50}")
-        print("Generated Output:")
-        print(actual_output)
-        print("\n")
+            
+            # Create test case
+            test_case = LLMTestCase(
+                input=test_input,
+                actual_output=actual_output,
+                expected_output=expected_output,
+                context=[json.dumps(scenario["data"])]
+            )
+            
+            test_cases.append(test_case)
+            
+            # Print the generated output for review
+            print(f"\n{'='*50}")
+            print(f"Scenario: {scenario['name']}")
+            print(f"{'='*50}")
+            print("Generated Output:")
+            print(actual_output)
+            print(f"Tokens: {usage.total_tokens} over {usage.calls} calls")
+            print("\n")
+    
+    if scheduler.exhausted:
+        print(f"Budget reached: stopped after {scheduler.scheduled} scenarios, remaining scenarios were not run")
+    print_generation_stats(gemini_model)
     
     return test_cases
 
 
-def run_evaluation():
+def run_evaluation(scenarios=None, budget=None):
     """Run the complete evaluation"""
     
     print("Creating test cases...")
-    test_cases = create_test_cases()
+    test_cases = create_test_cases(scenarios, budget)
     
     print(f"Running evaluation on {len(test_cases)} test cases...")
     
@@ -90,10 +114,11 @@ def run_evaluation():
     ]
     
     # Run evaluation
-    results = evaluate(
-        test_cases=test_cases,
-        metrics=metrics
-    )
+    with tracing.span('run.deepeval_evaluate'):
+        results = evaluate(
+            test_cases=test_cases,
+            metrics=metrics
+        )
     
     # Print results manually
     print("\n" + "="*60)
@@ -104,27 +129,34 @@ def run_evaluation():
         print(f"\nTest Case {i+1}:")
         print("-" * 30)
         
-        # Run each metric on this test case
+        # Scores from the evaluate() pass above are memoized, so this is a lookup rather than a second scoring
         for metric in metrics:
             score = metric.measure(test_case)
             print(f"{metric.__name__}: {score:.2f} ({'PASS' if metric.is_successful() else 'FAIL'})")
             print(f"  Reason: {metric.reason}")
     
+    memo = get_metric_memo()
+    if memo is not None:
+        stats = memo.stats()
+        print(f"\nMetric memo: {stats['hits']} hits, {stats['misses']} misses")
+    
     return results
 
 
-def analyze_single_scenario(data_payload, scenario_name="Custom"):
-    """Analyze a single scenario for quick testing"""
+def analyze_single_scenario(data_payload, scenario_name="Custom", budget=None):
+    """Analyze a single scenario for quick testing, charged to the run budget if given"""
     
-    gemini_model = GeminiModel()
-    prompt_template = load_prompt_template()
+    gemini_model = get_gemini_model()
     
     print(f"\n{'='*50}")
     print(f"Analyzing: {scenario_name}")
     print(f"{'='*50}")
     
     # Generate analysis
-    result = gemini_model.generate_response(prompt_template, data_payload)
+    result = generate_within_budget(gemini_model, data_payload, budget)
+    if result is None:
+        print("Budget reached: single scenario analysis was not run")
+        return None
     
     print("Input Data:")
     print(json.dumps(data_payload, indent=2))
@@ -132,8 +164,7 @@ def analyze_single_scenario(data_payload, scenario_name="Custom"):
     print(result)
     
     # Quick format check
-    lines = [line.strip() for line in result.split('\n') if line.strip()]
-    bullet_lines = [line for line in lines if line.startswith(('•', '-', '*')) or (len(line) > 10 and not line.endswith(':'))]
+    bullet_lines = ParsedOutput(result).extract_bullets(min_length=10, fallback=False)
     
     print(f"\nQuick Format Check:")
     print(f"Number of bullets: {len(bullet_lines)}")
@@ -145,16 +176,31 @@ def analyze_single_scenario(data_payload, scenario_name="Custom"):
 
 
 if __name__ == "__main__":
-    # Run single scenario analysis first
+    load_env()
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", help="JSONL scenario file (.jsonl, .jsonl.gz or .jsonl.zst)")
+    parser.add_argument("--lines", help="Line range start:stop of the scenario file to evaluate")
+    parser.add_argument("--token-budget", type=int, help="Stop cleanly before the run exceeds this many tokens")
+    parser.add_argument("--call-budget", type=int, help="Stop cleanly before the run exceeds this many API calls")
+    args = parser.parse_args()
+    
+    scenarios = iter_scenarios(args.scenarios, *parse_line_range(args.lines)) if args.scenarios else None
+    budget = budget_from_env(args.token_budget, args.call_budget)
+    
+    # Run single scenario analysis first, within the same budget as the full evaluation
     print("Running single scenario analysis...")
-    analyze_single_scenario(MARINA_BAY_DATA, "Marina Bay Residences")
+    analyze_single_scenario(MARINA_BAY_DATA, "Marina Bay Residences", budget)
     
     # Run full evaluation
     print("\n" + "="*60)
     print("STARTING FULL EVALUATION")
     print("="*60)
     
-    results = run_evaluation()
+    results = run_evaluation(scenarios, budget)
+    
+    # Per-stage timings when EVAL_TRACE is set
+    tracing.finish()
     
     print("\n" + "="*60)
     print("EVALUATION COMPLETE")
@@ -0,0 +1,97 @@
+"""
+Metric base class: a lightweight stand-in for deepeval's BaseMetric unless deepeval's is requested
+
+Importing deepeval takes seconds, and the rule-based metrics only need
+threshold / score / reason / success, so they subclass LightweightMetric
+by default. Scripts that hand the metrics to deepeval's evaluate(), which
+requires its own BaseMetric, call use_deepeval_base() before importing
+any metric module:
+
+    from metrics.base import use_deepeval_base
+    use_deepeval_base()
+    from metrics.custom_metrics import BuyerProfileAccuracyMetric
+
+BaseMetric is resolved on first import and fixed from then on, since the
+metric classes are built on it. Either way it provides an a_measure that
+runs the metric's synchronous measure in the metric executor.
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+from metrics.executor import measure_in_executor
+
+
+class ExecutorMeasureMixin:
+    """a_measure for metrics that score synchronously: measure runs in the metric executor"""
+
+    async def a_measure(self, test_case: Any, *args, **kwargs) -> float:
+        """Async measure for deepeval's concurrent evaluate(), without blocking its event loop"""
+        return await measure_in_executor(self, test_case)
+
+
+class LightweightMetric(ExecutorMeasureMixin, ABC):
+    """Attributes and methods of deepeval's BaseMetric that the rule-based metrics and runners use"""
+
+    # Part of the metric fingerprint (metrics.memo) with the class source; bump when
+    # shared helpers the metric relies on change. Same default as the fingerprint's
+    version: int = 0
+    # Estimated tokens per evaluation, used by the metric scheduler; None uses its
+    # DEFAULT_METRIC_COST, as for metrics on deepeval's base that declare none
+    estimated_cost: Optional[float] = None
+
+    threshold: float = 0.5
+    score: Optional[float] = None
+    reason: Optional[str] = None
+    success: Optional[bool] = None
+    error: Optional[str] = None
+    evaluation_cost: Optional[float] = 0
+    async_mode: bool = False
+    strict_mode: bool = False
+    include_reason: bool = True
+    verbose_mode: bool = False
+
+    @abstractmethod
+    def measure(self, test_case: Any, *args, **kwargs) -> float:
+        """Score test_case, setting score, success and reason"""
+
+    def is_successful(self) -> bool:
+        return bool(self.success)
+
+    @property
+    def __name__(self):
+        return type(self).__name__
+
+
+_use_deepeval = False
+_base: Optional[type] = None
+_base_lock = threading.Lock()
+
+
+def use_deepeval_base() -> None:
+    """
+    Build the metrics on deepeval's BaseMetric; call before importing any metric module
+
+    Raises:
+        RuntimeError: the metrics were already imported on the lightweight base
+    """
+    global _use_deepeval
+    with _base_lock:
+        if _base is LightweightMetric:
+            raise RuntimeError("Metrics already imported on the lightweight base; "
+                               "call use_deepeval_base() before importing them")
+        _use_deepeval = True
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved on first `from metrics.base import BaseMetric`, after any use_deepeval_base() call
+    global _base
+    if name != 'BaseMetric':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _base_lock:
+        if _base is None:
+            if _use_deepeval:
+                from deepeval.metrics import BaseMetric as DeepEvalBaseMetric
+                _base = type('BaseMetric', (ExecutorMeasureMixin, DeepEvalBaseMetric), {'__module__': __name__})
+            else:
+                _base = LightweightMetric
+        return _base
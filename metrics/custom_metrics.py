@@ -1,46 +1,58 @@
 """
 Custom evaluation metrics for real estate analysis prompt
 """
-import re
-from deepeval.metrics import BaseMetric
-from deepeval.test_case import LLMTestCase
-from typing import List
+from typing import TYPE_CHECKING, List
+from metrics.base import BaseMetric
+from metrics.parsing import parse_output
+from metrics.keyword_matching import KeywordMatcher
+from metrics.memo import memoized_measure
+from pipeline.tracing import traced
+
+if TYPE_CHECKING:
+    from deepeval.test_case import LLMTestCase
 
 
 class BuyerProfileAccuracyMetric(BaseMetric):
     """Evaluates if the model correctly identifies the buyer profile"""
     
+    version = 1
+    estimated_cost = 0
+    
+    # Investor-focused and owner-occupier focused language
+    investor_keywords = KeywordMatcher(["yield", "investor", "rental", "returns", "income"])
+    owner_keywords = KeywordMatcher(["legacy", "owner", "occupier", "home", "family", "lifestyle"])
+    
     def __init__(self, threshold: float = 0.8):
         self.threshold = threshold
         self.evaluation_cost = 0  # No additional API calls needed
     
-    def measure(self, test_case: LLMTestCase) -> float:
+    @memoized_measure
+    @traced()
+    def measure(self, test_case: 'LLMTestCase') -> float:
         """
         Measures accuracy of buyer profile identification
         Returns 1.0 if correct, 0.0 if incorrect
         """
-        actual_output = test_case.actual_output.lower()
-        expected_context = test_case.input.lower()
+        actual_output = parse_output(test_case).lower
         
         # Analyze the input data to determine expected buyer profile
         expected_profile = self._determine_expected_profile(test_case.input)
         
         # Check if the output indicates the correct profile
         if expected_profile == "yield_investor":
-            # Look for investor-focused language
-            investor_keywords = ["yield", "investor", "rental", "returns", "income"]
-            score = 1.0 if any(keyword in actual_output for keyword in investor_keywords) else 0.0
+            score = 1.0 if self.investor_keywords.any_in(actual_output) else 0.0
         else:  # legacy/owner-occupier
-            # Look for owner-occupier focused language
-            owner_keywords = ["legacy", "owner", "occupier", "home", "family", "lifestyle"]
-            score = 1.0 if any(keyword in actual_output for keyword in owner_keywords) else 0.0
+            score = 1.0 if self.owner_keywords.any_in(actual_output) else 0.0
         
         self.score = score
-        self.reason = f"Expected {expected_profile}, analysis shows {'correct' if score > 0.5 else 'incorrect'} identification"
+        self.reason = self._reason(expected_profile, score)
         self.success = score >= self.threshold
         
         return score
     
+    def _reason(self, expected_profile: str, score: float) -> str:
+        return f"Expected {expected_profile}, analysis shows {'correct' if score > 0.5 else 'incorrect'} identification"
+    
     def _determine_expected_profile(self, input_data: str) -> str:
         """Determine expected buyer profile based on input data"""
         # Extract sqft information (simplified logic)
@@ -60,31 +72,23 @@ class BuyerProfileAccuracyMetric(BaseMetric):
 class FormatComplianceMetric(BaseMetric):
     """Evaluates format compliance: 3 bullets, max 80 chars each"""
     
+    version = 1
+    estimated_cost = 0
+    
     def __init__(self, threshold: float = 1.0):
         self.threshold = threshold
         self.evaluation_cost = 0
     
-    def measure(self, test_case: LLMTestCase) -> float:
+    @memoized_measure
+    @traced()
+    def measure(self, test_case: 'LLMTestCase') -> float:
         """
         Measures format compliance
         Returns score based on adherence to format requirements
         """
-        actual_output = test_case.actual_output.strip()
-        
-        # Split into lines and filter out empty ones
-        lines = [line.strip() for line in actual_output.split('\n') if line.strip()]
-        
-        # Remove any headers or extra text, focus on bullet points
-        bullet_lines = []
-        for line in lines:
-            if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                bullet_lines.append(line)
-            elif len(line) > 10 and not line.endswith(':'):  # Likely a bullet without symbol
-                bullet_lines.append(line)
-        
-        # If no clear bullets found, treat all substantial lines as bullets
-        if not bullet_lines:
-            bullet_lines = [line for line in lines if len(line) > 10]
+        # Bullet points, ignoring headers; falls back to all substantial lines
+        parsed = parse_output(test_case)
+        bullet_lines = parsed.bullets
         
         score_components = []
         
@@ -94,10 +98,8 @@ class FormatComplianceMetric(BaseMetric):
         
         # Check character count for each bullet
         char_count_scores = []
-        for bullet in bullet_lines:
-            # Remove bullet symbols for character counting
-            clean_bullet = re.sub(r'^[•\-\*]\s*', '', bullet)
-            char_count = len(clean_bullet)
+        for char_count in parsed.char_counts:
+            # Counts exclude the leading bullet symbol
             char_score = 1.0 if char_count <= 80 else max(0.0, 1.0 - (char_count - 80) / 40)
             char_count_scores.append(char_score)
         
@@ -123,54 +125,46 @@ class FormatComplianceMetric(BaseMetric):
 class ThemeStructureMetric(BaseMetric):
     """Evaluates adherence to Unit-Project-Location theme structure"""
     
+    version = 1
+    estimated_cost = 0
+    
+    # Theme keywords for the first (unit), second (project) and third (location) bullet
+    theme_keywords = (
+        KeywordMatcher(['sqft', 'spacious', 'bedroom', 'unit', 'space', 'layout', 'floor', 'view']),
+        KeywordMatcher(['residence', 'building', 'development', 'amenities', 'facilities', 'estate']),
+        KeywordMatcher(['mrt', 'location', 'district', 'neighborhood', 'area', 'mins', 'walk', 'proximity'])
+    )
+    
     def __init__(self, threshold: float = 0.7):
         self.threshold = threshold
         self.evaluation_cost = 0
     
-    def measure(self, test_case: LLMTestCase) -> float:
+    @memoized_measure
+    @traced()
+    def measure(self, test_case: 'LLMTestCase') -> float:
         """
         Measures adherence to Unit-Project-Location theme structure
         """
-        actual_output = test_case.actual_output.lower()
-        
         # Extract bullet points
-        lines = [line.strip() for line in actual_output.split('\n') if line.strip()]
-        bullet_lines = []
-        
-        for line in lines:
-            if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                bullet_lines.append(line)
-            elif len(line) > 10 and not line.endswith(':'):
-                bullet_lines.append(line)
+        bullet_lines = parse_output(test_case).lower_bullets
         
-        if not bullet_lines:
-            bullet_lines = [line for line in lines if len(line) > 10]
+        # Bullets 1-3 should focus on unit, project and location respectively
+        theme_hits = [
+            matcher.any_in(bullet) for matcher, bullet in zip(self.theme_keywords, bullet_lines)
+        ]
         
-        theme_scores = []
-        
-        # Define theme keywords
-        unit_keywords = ['sqft', 'spacious', 'bedroom', 'unit', 'space', 'layout', 'floor', 'view']
-        project_keywords = ['residence', 'building', 'development', 'amenities', 'facilities', 'estate']
-        location_keywords = ['mrt', 'location', 'district', 'neighborhood', 'area', 'mins', 'walk', 'proximity']
-        
-        for i, bullet in enumerate(bullet_lines):
-            if i == 0:  # First bullet should focus on unit
-                score = 1.0 if any(keyword in bullet for keyword in unit_keywords) else 0.5
-            elif i == 1:  # Second bullet should focus on project
-                score = 1.0 if any(keyword in bullet for keyword in project_keywords) else 0.5
-            elif i == 2:  # Third bullet should focus on location
-                score = 1.0 if any(keyword in bullet for keyword in location_keywords) else 0.5
-            else:
-                score = 0.5  # Extra bullets get neutral score
-            
-            theme_scores.append(score)
-        
-        self.score = sum(theme_scores) / len(theme_scores) if theme_scores else 0.0
+        self.score = self._score(theme_hits, len(bullet_lines))
         self.reason = f"Theme structure adherence across {len(bullet_lines)} bullets"
         self.success = self.score >= self.threshold
         
         return self.score
     
+    def _score(self, theme_hits: List[bool], bullet_count: int) -> float:
+        """Themed bullets score 1.0 on a keyword hit, otherwise (and for extra bullets) 0.5"""
+        theme_scores = [1.0 if hit else 0.5 for hit in theme_hits]
+        theme_scores.extend([0.5] * (bullet_count - len(theme_hits)))
+        return sum(theme_scores) / len(theme_scores) if theme_scores else 0.0
+    
     def is_successful(self) -> bool:
         return self.success
     
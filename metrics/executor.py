@@ -0,0 +1,87 @@
+"""
+Executor offload for async metric measurement
+
+The rule-based metrics score in pure Python, so a_measure runs measure in
+an executor instead of on the event loop, letting deepeval's async
+evaluate() keep LLM-judge requests in flight while outputs are scored.
+EVAL_METRIC_EXECUTOR selects where scoring runs:
+
+    thread   (default) a shared thread pool; frees the event loop, and
+             scoring overlaps with I/O but not with other scoring (GIL)
+    process  the metric runner's process pool (EVAL_WORKERS workers); scoring
+             also runs in parallel, at the cost of pickling each case
+    inline   on the event loop, as a synchronous measure would
+"""
+import os
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional, Tuple
+from metrics.memo import get_metric_memo, memo_key
+from pipeline.metric_runner import default_workers, discard_metric_pool, get_metric_pool
+
+
+EXECUTOR_MODES = ('thread', 'process', 'inline')
+
+
+def executor_mode() -> str:
+    mode = (os.getenv('EVAL_METRIC_EXECUTOR') or 'thread').lower()
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Unknown EVAL_METRIC_EXECUTOR {mode!r}, expected one of {', '.join(EXECUTOR_MODES)}")
+    return mode
+
+
+_executor: Optional[Executor] = None
+_executor_configured = False
+_executor_lock = threading.Lock()
+
+
+def get_metric_executor() -> Optional[Executor]:
+    """Process-wide executor for a_measure per EVAL_METRIC_EXECUTOR; None for inline scoring"""
+    global _executor, _executor_configured
+    if executor_mode() == 'process':
+        # Shared with evaluate_metrics, which owns (and may replace) the pool
+        return get_metric_pool(default_workers())
+    with _executor_lock:
+        if not _executor_configured:
+            if executor_mode() == 'thread':
+                _executor = ThreadPoolExecutor(thread_name_prefix='metric')
+            _executor_configured = True
+        return _executor
+
+
+def _measure_copy(metric: Any, test_case: Any) -> Tuple[float, Any, Any]:
+    """measure on a worker's copy of the metric, returning the state the caller's copy needs"""
+    score = metric.measure(test_case)
+    return score, metric.success, metric.reason
+
+
+async def measure_in_executor(metric: Any, test_case: Any) -> float:
+    """
+    Await metric.measure(test_case) without blocking the event loop
+
+    Sets score, success and reason on the metric as measure does. Process
+    workers score a copy, so the memo is consulted and filled here instead.
+    """
+    executor = get_metric_executor()
+    if executor is None:
+        return metric.measure(test_case)
+
+    loop = asyncio.get_running_loop()
+    if not isinstance(executor, ProcessPoolExecutor):
+        return await loop.run_in_executor(executor, metric.measure, test_case)
+
+    memo = get_metric_memo()
+    key = memo_key(metric, test_case) if memo is not None else None
+    entry = memo.get(key) if memo is not None else None
+    if entry is None:
+        try:
+            entry = await loop.run_in_executor(executor, _measure_copy, metric, test_case)
+        except BrokenProcessPool:
+            discard_metric_pool(executor)
+            raise
+        if memo is not None:
+            memo.set(key, entry)
+    metric.score, metric.success, metric.reason = entry
+    return metric.score
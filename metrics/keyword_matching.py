@@ -0,0 +1,27 @@
+"""
+Compiled multi-keyword matching for rule-based metrics
+"""
+import re
+from typing import AbstractSet, Iterable
+
+
+class KeywordMatcher:
+    """Substring matcher for a keyword list compiled once into an alternation regex"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self._search = re.compile('|'.join(re.escape(keyword) for keyword in self.keywords)).search
+
+    def any_in(self, text: str) -> bool:
+        """Equivalent to any(keyword in text for keyword in keywords)"""
+        return self._search(text) is not None
+
+    def present(self, text: str) -> AbstractSet[str]:
+        """
+        Keywords for which `keyword in text` holds
+
+        A per-keyword substring check: CPython's `in` beats a scan of the
+        compiled alternation for short keyword lists, and overlapping
+        keywords would need a lookahead scan to be found at all.
+        """
+        return {keyword for keyword in self.keywords if keyword in text}
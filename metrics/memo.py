@@ -0,0 +1,209 @@
+"""
+Memoization of metric results keyed by metric config and test case content
+
+A result is identified by the metric's fingerprint (class, version,
+threshold and class source) and a hash of the test case's input and
+actual_output, so re-scoring unchanged outputs with unchanged metrics is a
+lookup. Results are kept in process and,
+with EVAL_METRIC_MEMO=disk, also in a SQLite file shared across runs.
+Bump a metric's `version` when shared helpers it relies on change.
+"""
+import os
+import json
+import atexit
+import sqlite3
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+DEFAULT_MEMO_PATH = ".deepeval/metric_memo.db"
+
+# (score, success, reason)
+MemoEntry = Tuple[float, bool, str]
+
+# Buffered disk writes that trigger a commit without waiting for flush()
+FLUSH_SIZE = 1024
+
+
+_source_hashes: Dict[type, str] = {}
+
+
+def _source_hash(cls: type) -> str:
+    source_hash = _source_hashes.get(cls)
+    if source_hash is None:
+        try:
+            source = inspect.getsource(cls)
+        except (OSError, TypeError):
+            source = ''
+        source_hash = _source_hashes[cls] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    return source_hash
+
+
+def metric_fingerprint(metric: Any) -> str:
+    """
+    Hash of what a metric's scores depend on: class, version, threshold and class source
+
+    Editing a metric class changes its fingerprint on its own; changes to
+    shared helpers it calls (parsing, keyword matching) need a version bump.
+    """
+    cls = type(metric)
+    material = json.dumps([
+        f"{cls.__module__}.{cls.__qualname__}",
+        getattr(metric, 'version', 0),
+        getattr(metric, 'threshold', None),
+        _source_hash(cls)
+    ], default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def memo_key(metric: Any, test_case: Any) -> str:
+    """Identity of one metric result: the metric fingerprint plus the test case content"""
+    material = json.dumps([
+        metric_fingerprint(metric),
+        getattr(test_case, 'input', None),
+        getattr(test_case, 'actual_output', None)
+    ], default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class MetricMemo:
+    """
+    In-process LRU of metric results, optionally backed by a SQLite file
+
+    Disk writes are buffered and committed together by flush(), which
+    evaluate_metrics calls once per batch, or once FLUSH_SIZE results are
+    pending and at exit, so measure() does not commit per result.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, MemoEntry]' = OrderedDict()
+        self._pending: Dict[str, MemoEntry] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metric_results ("
+                "key TEXT PRIMARY KEY, score REAL NOT NULL, success INTEGER NOT NULL, reason TEXT)"
+            )
+            self._conn.commit()
+            atexit.register(self.flush)
+
+    def _remember(self, key: str, entry: MemoEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[MemoEntry]:
+        with self._lock:
+            entry = self._entries.get(key) or self._pending.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT score, success, reason FROM metric_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], bool(row[1]), row[2])
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+            return entry
+
+    def set_many(self, items: Sequence[Tuple[str, MemoEntry]]) -> None:
+        with self._lock:
+            for key, entry in items:
+                self._remember(key, entry)
+            if self._conn is not None:
+                self._pending.update(items)
+                if len(self._pending) >= FLUSH_SIZE:
+                    self._write_pending()
+
+    def set(self, key: str, entry: MemoEntry) -> None:
+        self.set_many([(key, entry)])
+
+    def _write_pending(self) -> None:
+        # Caller holds the lock
+        if self._pending:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO metric_results (key, score, success, reason) VALUES (?, ?, ?, ?)",
+                [(key, score, int(bool(success)), reason) for key, (score, success, reason) in self._pending.items()]
+            )
+            self._conn.commit()
+            self._pending.clear()
+
+    def flush(self) -> None:
+        """Commit buffered results to the SQLite file, if any"""
+        with self._lock:
+            if self._conn is not None:
+                self._write_pending()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+def memo_from_env() -> Optional[MetricMemo]:
+    """Memo per EVAL_METRIC_MEMO: memory (default), disk (EVAL_METRIC_MEMO_PATH) or off"""
+    mode = (os.getenv('EVAL_METRIC_MEMO') or 'memory').lower()
+    if mode == 'off':
+        return None
+    if mode == 'disk':
+        return MetricMemo(os.getenv('EVAL_METRIC_MEMO_PATH') or DEFAULT_MEMO_PATH)
+    return MetricMemo()
+
+
+_memo: Optional[MetricMemo] = None
+_memo_configured = False
+_memo_lock = threading.Lock()
+
+
+def get_metric_memo() -> Optional[MetricMemo]:
+    """Process-wide metric memo shared by every metric and runner; None when disabled"""
+    global _memo, _memo_configured
+    with _memo_lock:
+        if not _memo_configured:
+            _memo = memo_from_env()
+            _memo_configured = True
+        return _memo
+
+
+def set_metric_memo(memo: Optional[MetricMemo]) -> None:
+    """Replace the process-wide memo, e.g. None to always score (benchmarks, worker processes)"""
+    global _memo, _memo_configured
+    with _memo_lock:
+        _memo = memo
+        _memo_configured = True
+
+
+def memoized_measure(measure: Callable) -> Callable:
+    """Decorator for a metric's measure: serve score/reason/success from the memo when known"""
+    @wraps(measure)
+    def wrapper(self, test_case, *args, **kwargs):
+        memo = get_metric_memo()
+        if memo is None:
+            return measure(self, test_case, *args, **kwargs)
+
+        key = memo_key(self, test_case)
+        entry = memo.get(key)
+        if entry is not None:
+            self.score, self.success, self.reason = entry
+            return self.score
+
+        score = measure(self, test_case, *args, **kwargs)
+        memo.set(key, (score, self.success, self.reason))
+        return score
+    return wrapper
@@ -0,0 +1,120 @@
+"""
+Parse-once representation of a model output shared by all metrics
+"""
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+
+BULLET_SYMBOLS = ('•', '-', '*')
+
+
+class lazy_property:
+    """
+    Lock-free functools.cached_property: the first access stores the value in the
+    instance dict, which then shadows this non-data descriptor
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+
+class ParsedOutput:
+    """Lines, bullets and derived views of an actual_output, each computed at most once"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._bullets: Dict[Tuple[int, bool], List[str]] = {}
+
+    @lazy_property
+    def lines(self) -> List[str]:
+        """Non-empty, stripped lines of the output"""
+        return [line.strip() for line in self.text.split('\n') if line.strip()]
+
+    @lazy_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    def extract_bullets(self, min_length: int = 10, fallback: bool = True) -> List[str]:
+        """
+        Bullet lines: lines starting with a bullet symbol, or longer than
+        min_length chars and not ending with ':' (i.e. not a header)
+
+        Args:
+            min_length: Minimum length for an unmarked line to count as a bullet
+            fallback: If no bullets are found, treat all lines over 10 chars as bullets
+        """
+        key = (min_length, fallback)
+        bullets = self._bullets.get(key)
+        if bullets is None:
+            bullets = [
+                line for line in self.lines
+                if line.startswith(BULLET_SYMBOLS) or (len(line) > min_length and not line.endswith(':'))
+            ]
+            if fallback and not bullets:
+                bullets = [line for line in self.lines if len(line) > 10]
+            self._bullets[key] = bullets
+        return bullets
+
+    @lazy_property
+    def bullets(self) -> List[str]:
+        """Bullets using the standard rule shared by the custom metrics"""
+        return self.extract_bullets()
+
+    @lazy_property
+    def lower_bullets(self) -> List[str]:
+        return [bullet.lower() for bullet in self.bullets]
+
+    @lazy_property
+    def clean_bullets(self) -> List[str]:
+        """Bullets with the leading bullet symbol removed"""
+        return [strip_symbol(bullet) for bullet in self.bullets]
+
+    @lazy_property
+    def char_counts(self) -> List[int]:
+        return [len(bullet) for bullet in self.clean_bullets]
+
+    @lazy_property
+    def strict_bullets(self) -> List[str]:
+        """Bullets using the stricter minimal-metrics rule (over 20 chars, no fallback)"""
+        return self.extract_bullets(min_length=20, fallback=False)
+
+    @lazy_property
+    def strict_char_counts(self) -> List[int]:
+        return [len(strip_symbol(bullet)) for bullet in self.strict_bullets]
+
+
+def strip_symbol(bullet: str) -> str:
+    """Same as re.sub(r'^[•\-\*]\s*', '', bullet) without the regex machinery"""
+    return bullet[1:].lstrip() if bullet.startswith(BULLET_SYMBOLS) else bullet
+
+
+@lru_cache(maxsize=1024)
+def _parse_text(text: str) -> ParsedOutput:
+    return ParsedOutput(text)
+
+
+def parse_output(test_case) -> ParsedOutput:
+    """
+    Return the ParsedOutput for a test case, memoized on the test case
+
+    Test case types that reject new attributes fall back to a cache keyed by
+    the output text.
+    """
+    parsed = getattr(test_case, '_parsed_output', None)
+    if parsed is not None and parsed.text is test_case.actual_output:
+        return parsed
+
+    parsed = ParsedOutput(test_case.actual_output)
+    try:
+        setattr(test_case, '_parsed_output', parsed)
+    except (AttributeError, TypeError, ValueError):
+        parsed = _parse_text(test_case.actual_output)
+    return parsed
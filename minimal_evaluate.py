@@ -2,9 +2,16 @@
 Minimal evaluation script using only essential metrics
 """
 import json
-from models.llm_integration import GeminiModel, load_prompt_template, create_test_input
+import argparse
+from models.llm_integration import get_gemini_model, create_test_input, load_env, print_generation_stats
 from metrics.minimal_metrics import MinimalFormatMetric, MinimalRelevanceMetric, MinimalLogicMetric
+from pipeline.results_sink import ResultsSink, pending_scenarios
+from pipeline.incremental import IncrementalPlan, evaluate_pending_metrics, generate_outputs, metric_hashes
+from pipeline.metric_scheduler import MetricSchedule, metric_names
+from pipeline import tracing
 from data.test_data import MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO
+from data.scenario_loader import DEFAULT_BATCH_SIZE, iter_scenarios, parse_line_range
+from pipeline.budget import BudgetScheduler, RunBudget, budget_from_env, generate_within_budget
 
 
 class SimpleTestCase:
@@ -16,22 +23,37 @@ class SimpleTestCase:
         self.context = context or []
 
 
-def minimal_evaluation():
-    """Run evaluation with minimal essential metrics only"""
+# Must pass for an overall pass; a failure also skips costlier metrics (e.g. LLM-as-judge) for that case
+CRITICAL_METRICS = (MinimalFormatMetric, MinimalRelevanceMetric)
+
+
+def minimal_evaluation(scenarios=None, results_path=None, budget=None, incremental=False):
+    """
+    Run evaluation with minimal essential metrics only, optionally on a streamed scenario iterable
+    
+    Results are appended to the results sink per scenario; with results_path a
+    restarted run skips scenarios already recorded for the same payload, prompt and model.
+    With incremental, recorded scenarios whose metrics changed since are re-scored
+    on their stored output instead of being skipped, without generation.
+    Metrics run cheapest first, and a failing critical metric skips costlier
+    ones for that scenario; they are recorded with 'skipped_by'.
+    With a limited budget, scenarios run by descending 'priority' and the run
+    stops cleanly before the budget would be exceeded.
+    
+    Returns {'scenarios', 'passed', 'results_path'}: counts over the records
+    in the sink, so scenarios recorded by earlier runs are included. They are
+    counted while streaming the sink, so memory stays bounded; per-scenario
+    metric results, keyed by metric class name, are in the records at
+    results_path.
+    """
     
     print("🎯 MINIMAL EVALUATION - Essential Metrics Only")
     print("="*60)
     
     # Initialize model
-    gemini_model = GeminiModel()
-    prompt_template = load_prompt_template()
-    
-    # Test scenarios
-    scenarios = [
-        ("Waterfront Residences", MARINA_BAY_DATA),
-        ("Compact Towers", YIELD_INVESTOR_SCENARIO),
-        ("Premium Towers", LEGACY_BUYER_SCENARIO)
-    ]
+    gemini_model = get_gemini_model()
+    # Template plus rendering config, so outputs from another payload format or cache mode are not reused
+    prompt_hash = gemini_model.prompt_hash()
     
     # Minimal essential metrics
     metrics = [
@@ -39,98 +61,173 @@ def minimal_evaluation():
         MinimalRelevanceMetric(threshold=0.7),   # Must pass - critical  
         MinimalLogicMetric(threshold=0.6)        # Optional - nice to have
     ]
+    current_metric_hashes = metric_hashes(metrics)
+    # Results are keyed by metric class; display names are only for printing
+    names = metric_names(metrics)
     
-    results = []
+    # Cheapest metrics first; critical ones gate the rest
+    schedule = MetricSchedule(metrics, gating=CRITICAL_METRICS)
     
-    for scenario_name, data in scenarios:
-        print(f"\n📊 Evaluating: {scenario_name}")
-        print("-" * 40)
-        
-        # Generate response
-        test_input = create_test_input(data)
-        actual_output = gemini_model.generate_response(prompt_template, data)
-        
-        # Create test case
-        test_case = SimpleTestCase(
-            input_text=test_input,
-            actual_output=actual_output,
-            expected_output="Expected investment theses",
-            context=[json.dumps(data)]
-        )
-        
-        print("Generated Output:")
-        print(actual_output[:200] + "..." if len(actual_output) > 200 else actual_output)
-        print()
+    sink = ResultsSink(results_path)
+    plan = IncrementalPlan(prompt_hash, gemini_model.model_name, metrics).load(sink) if incremental and results_path else None
+    completed = sink.completed_keys() if results_path and plan is None else set()
+    if completed:
+        print(f"Resuming: {len(completed)} scenarios already recorded in {results_path}")
+    
+    # Test scenarios
+    scenarios = scenarios if scenarios is not None else [
+        {"name": "Waterfront Residences", "data": MARINA_BAY_DATA},
+        {"name": "Compact Towers", "data": YIELD_INVESTOR_SCENARIO},
+        {"name": "Premium Towers", "data": LEGACY_BUYER_SCENARIO}
+    ]
+    if plan is not None:
+        scenarios = plan.pending(scenarios)
+    else:
+        scenarios = pending_scenarios(scenarios, completed, prompt_hash, gemini_model.model_name)
+    
+    scheduler = BudgetScheduler(budget or RunBudget(), DEFAULT_BATCH_SIZE)
+    
+    # Scenarios may be a lazy stream, so generate and score them in bounded batches
+    for batch in scheduler.batches(scenarios):
+        # The single-scenario prompt is the test case input and, unpacked, the request sent to the model
+        test_inputs = [create_test_input(scenario["data"], payload_format=gemini_model.payload_format) for scenario in batch]
         
-        # Run minimal metrics
-        scenario_results = {}
-        critical_passed = 0
+        # Generate the batch concurrently (packed when GEMINI_PACK_SIZE > 1), results come back in scenario order;
+        # scenarios re-scored by an incremental run keep their stored output
+        with tracing.span('run.generate'):
+            outputs, usages, spent = generate_outputs(gemini_model, batch, test_inputs)
+        scheduler.record(spent)
         
-        for metric in metrics:
-            score = metric.measure(test_case)
-            success = metric.is_successful()
-            is_critical = metric.__name__ in ["Format Compliance", "Output Relevance"]
-            
-            if is_critical and success:
-                critical_passed += 1
-            
-            scenario_results[metric.__name__] = {
-                'score': score,
-                'success': success,
-                'critical': is_critical,
-                'reason': metric.reason
-            }
-            
-            # Display with priority indicators
-            priority = "🔴 CRITICAL" if is_critical else "🟡 OPTIONAL"
-            status = "✅ PASS" if success else "❌ FAIL"
-            print(f"{priority} {metric.__name__}: {score:.2f} ({status})")
-            print(f"   └─ {metric.reason}")
+        # Create test cases
+        test_cases = [
+            SimpleTestCase(
+                input_text=test_input,
+                actual_output=actual_output,
+                expected_output="Expected investment theses",
+                context=[json.dumps(scenario["data"])]
+            )
+            for scenario, test_input, actual_output in zip(batch, test_inputs, outputs)
+        ]
         
-        # Overall assessment
-        overall_pass = critical_passed >= 2  # Must pass both critical metrics
-        results.append((scenario_name, scenario_results, overall_pass))
+        # Run minimal metrics across worker processes (only the stale ones on re-scored scenarios), results in scenario order
+        all_results = evaluate_pending_metrics(test_cases, batch, schedule)
         
-        print(f"\n{'🎉 OVERALL: PASS' if overall_pass else '⚠️  OVERALL: NEEDS IMPROVEMENT'}")
-        print(f"Critical metrics passed: {critical_passed}/2")
+        with tracing.span('run.print_results'):
+            for scenario, test_case, metric_results, usage in zip(batch, test_cases, all_results, usages):
+                scenario_name = scenario["name"]
+                print(f"\n📊 Evaluating: {scenario_name}")
+                print("-" * 40)
+                
+                actual_output = test_case.actual_output
+                print("Generated Output:")
+                print(actual_output[:200] + "..." if len(actual_output) > 200 else actual_output)
+                print()
+                
+                scenario_results = {}
+                critical_passed = 0
+                
+                for metric_key, result in metric_results.items():
+                    metric_name = names[metric_key]
+                    is_critical = metric_key in schedule.gating
+                    
+                    if is_critical and result['success']:
+                        critical_passed += 1
+                    
+                    scenario_results[metric_key] = {
+                        'score': result['score'],
+                        'success': result['success'],
+                        'critical': is_critical,
+                        'reason': result['reason']
+                    }
+                    
+                    # Display with priority indicators
+                    priority = "🔴 CRITICAL" if is_critical else "🟡 OPTIONAL"
+                    if 'skipped_by' in result:
+                        scenario_results[metric_key]['skipped_by'] = result['skipped_by']
+                        print(f"{priority} {metric_name}: ⏭️  SKIPPED")
+                    else:
+                        status = "✅ PASS" if result['success'] else "❌ FAIL"
+                        print(f"{priority} {metric_name}: {result['score']:.2f} ({status})")
+                    print(f"   └─ {result['reason']}")
+                
+                # Overall assessment
+                overall_pass = critical_passed >= 2  # Must pass both critical metrics
+                sink.append({
+                    'key': scenario['key'],
+                    'payload_hash': scenario['payload_hash'],
+                    'prompt_hash': prompt_hash,
+                    'model': gemini_model.model_name,
+                    'scenario': scenario_name,
+                    'actual_output': actual_output,
+                    'usage': usage.as_dict(),
+                    'metrics': scenario_results,
+                    'metric_hashes': current_metric_hashes,
+                    'overall_pass': overall_pass
+                })
+                
+                print(f"\n{'🎉 OVERALL: PASS' if overall_pass else '⚠️  OVERALL: NEEDS IMPROVEMENT'}")
+                print(f"Critical metrics passed: {critical_passed}/2")
+                print(f"Tokens: {usage.total_tokens} over {usage.calls} calls")
     
-    # Summary
+    if scheduler.exhausted:
+        print(f"Budget reached: stopped after {scheduler.scheduled} scenarios, remaining scenarios were not run")
+    print_generation_stats(gemini_model)
+    schedule_stats = schedule.stats()
+    print(f"Metric scheduler: {schedule_stats['evaluated']} evaluations, {schedule_stats['skipped']} skipped after a critical failure, "
+          f"~{schedule_stats['estimated_cost_saved']:.0f} estimated tokens saved")
+    if plan is not None:
+        stats = plan.stats()
+        print(f"Incremental: {stats['up_to_date']} up to date, {stats['rescored']} re-scored from stored outputs, "
+              f"{stats['generated']} generated")
+    
+    # Summary, streamed from the sink so it also covers results from earlier runs
     print(f"\n{'='*60}")
     print("📋 MINIMAL EVALUATION SUMMARY")
     print("="*60)
     
-    total_pass = sum(1 for _, _, passed in results if passed)
-    
-    for scenario_name, results_dict, overall_pass in results:
-        status = "✅" if overall_pass else "❌"
-        print(f"{status} {scenario_name}: {'PASS' if overall_pass else 'FAIL'}")
-        
-        # Show critical metrics only in summary
-        for metric_name, result in results_dict.items():
-            if result['critical']:
-                status_icon = "✅" if result['success'] else "❌"
-                print(f"    {status_icon} {metric_name}: {result['score']:.2f}")
+    total = total_pass = 0
+    with tracing.span('run.summary'):
+        for record in sink.latest():
+            if record.get('model') != gemini_model.model_name or record.get('prompt_hash') != prompt_hash:
+                continue
+            
+            overall_pass = record['overall_pass']
+            total += 1
+            total_pass += bool(overall_pass)
+            
+            status = "✅" if overall_pass else "❌"
+            print(f"{status} {record['scenario']}: {'PASS' if overall_pass else 'FAIL'}")
+            
+            # Show critical metrics only in summary
+            for metric_key, result in record['metrics'].items():
+                if result['critical']:
+                    status_icon = "✅" if result['success'] else "❌"
+                    print(f"    {status_icon} {names.get(metric_key, metric_key)}: {result['score']:.2f}")
     
-    print(f"\nOverall Success Rate: {total_pass}/{len(results)} scenarios passed")
+    print(f"\nOverall Success Rate: {total_pass}/{total} scenarios passed")
     
-    return results
+    sink.close()
+    return {'scenarios': total, 'passed': total_pass, 'results_path': results_path}
 
 
-def quick_check(data_payload, scenario_name="Quick Test"):
-    """Ultra-fast check with just critical metrics"""
+def quick_check(data_payload, scenario_name="Quick Test", budget=None):
+    """Ultra-fast check with just critical metrics, charged to the run budget if given"""
     
     print(f"⚡ QUICK CHECK: {scenario_name}")
     print("-" * 30)
     
-    gemini_model = GeminiModel()
-    prompt_template = load_prompt_template()
+    gemini_model = get_gemini_model()
+    test_input = create_test_input(data_payload, payload_format=gemini_model.payload_format)
     
     # Generate response
-    result = gemini_model.generate_response(prompt_template, data_payload)
+    result = generate_within_budget(gemini_model, data_payload, budget, test_input)
+    if result is None:
+        print("Budget reached: quick check was not run")
+        return False
     
     # Create test case
     test_case = SimpleTestCase(
-        input_text=create_test_input(data_payload),
+        input_text=test_input,
         actual_output=result,
         expected_output="Quick test",
         context=[json.dumps(data_payload)]
@@ -162,6 +259,20 @@ def quick_check(data_payload, scenario_name="Quick Test"):
 
 
 if __name__ == "__main__":
+    load_env()
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", help="JSONL scenario file (.jsonl, .jsonl.gz or .jsonl.zst)")
+    parser.add_argument("--lines", help="Line range start:stop of the scenario file to evaluate")
+    parser.add_argument("--results", help="Append-only JSONL results file; rerunning resumes where it stopped")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --results, re-score recorded scenarios whose metrics changed and generate only new or invalidated ones")
+    parser.add_argument("--token-budget", type=int, help="Stop cleanly before the run exceeds this many tokens")
+    parser.add_argument("--call-budget", type=int, help="Stop cleanly before the run exceeds this many API calls")
+    args = parser.parse_args()
+    
+    scenarios = iter_scenarios(args.scenarios, *parse_line_range(args.lines)) if args.scenarios else None
+    
     print("Choose evaluation mode:")
     print("1. Minimal evaluation (3 metrics, all scenarios)")
     print("2. Quick check (2 critical metrics, Waterfront only)")
@@ -169,6 +280,10 @@ if __name__ == "__main__":
     choice = input("Enter choice (1 or 2): ").strip()
     
     if choice == "2":
-        quick_check(MARINA_BAY_DATA, "Waterfront Residences")
+        quick_check(MARINA_BAY_DATA, "Waterfront Residences", budget_from_env(args.token_budget, args.call_budget))
     else:
-        minimal_evaluation()
+        minimal_evaluation(scenarios, args.results, budget_from_env(args.token_budget, args.call_budget),
+                           args.incremental)
+    
+    # Per-stage timings when EVAL_TRACE is set
+    tracing.finish()
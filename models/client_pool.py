@@ -0,0 +1,94 @@
+"""
+Process-wide pool of Gemini model clients
+"""
+import json
+import asyncio
+import threading
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
+
+
+ClientKey = Tuple[str, str, str]
+T = TypeVar('T')
+
+
+class ClientPool:
+    """
+    Thread-safe GenerativeModel clients keyed by (api key, model name, generation config)
+
+    genai.configure resets the SDK's transport clients, so it runs only when
+    the API key changes. Pooled models keep their transport (gRPC channel or
+    REST session) alive between calls, so repeated GeminiModel construction
+    reuses open connections instead of repeating setup and TLS handshakes.
+    The SDK keeps a single global configuration, so a process should still
+    use one API key at a time.
+
+    The SDK's async calls bind their gRPC channel to the event loop they
+    first run on, so every synchronous entry point runs its coroutines on
+    the pool's single event loop (run) instead of a fresh asyncio.run loop.
+    """
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, Any] = {}
+        self._configured_key: Optional[str] = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def key(api_key: str, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> ClientKey:
+        return api_key, model_name, json.dumps(generation_config or {}, sort_keys=True, default=str)
+
+    def get(self, api_key: str, model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> Any:
+        """Pooled GenerativeModel for the key, created on first use"""
+        key = self.key(api_key, model_name, generation_config)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.reused += 1
+                return client
+
+            # Deferred so importing the model layer does not load the SDK
+            import google.generativeai as genai
+            if self._configured_key != api_key:
+                genai.configure(api_key=api_key)
+                self._configured_key = api_key
+            client = genai.GenerativeModel(model_name, generation_config=generation_config or None)
+            self._clients[key] = client
+            self.created += 1
+            return client
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        """
+        Run a coroutine to completion on the pool's event loop, created on first use
+
+        The loop persists across calls, so pooled clients' async transports stay
+        bound to it. Callers from several threads take turns; concurrency belongs
+        inside the coroutine. Like asyncio.run, it cannot be called from a running loop.
+        """
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(coroutine)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._configured_key = None
+
+    def stats(self) -> Dict[str, int]:
+        return {'clients': len(self._clients), 'created': self.created, 'reused': self.reused}
+
+
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> ClientPool:
+    """Process-wide client pool shared by every GeminiModel"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool()
+        return _pool
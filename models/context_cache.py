@@ -0,0 +1,144 @@
+"""
+Context caching of the static prompt text around the data payload
+
+Everything in a single-payload template except {data_payload} (Persona, Task,
+Analytical Framework, Format) is the same for every scenario. With context
+caching enabled, that static text is registered once per template, as Gemini
+cached content or as a system instruction, and each request sends only the
+serialized payload. Prompts that do not match a template (e.g. packed
+prompts) and templates whose registration failed are sent whole, as before.
+"""
+import os
+import time
+import datetime
+import threading
+from typing import Any, Dict, Optional, Tuple
+from models.prompt_registry import CompiledTemplate, PromptRegistry, get_registry
+
+
+CONTEXT_CACHE_MODES = ('off', 'system', 'cached')
+
+# Stands in for the payload in the static instruction
+PAYLOAD_NOTE = "(The data payload for this request is provided in the user message.)"
+
+# Cached content is re-created this long before its TTL runs out
+_EXPIRY_MARGIN_SECONDS = 60
+
+
+class GeminiContextBackend:
+    """
+    Creates Gemini models bound to a static instruction
+
+    PrefixCache only calls these two methods, so a local fake with the same
+    methods (returning objects with generate_content / generate_content_async)
+    exercises the routing without the API.
+    """
+
+    def cached_content_model(self, model_name: str, generation_config: Dict[str, Any],
+                             instruction: str, ttl_seconds: int) -> Any:
+        """Model that reads the instruction from server-side cached content"""
+        import google.generativeai as genai
+        from google.generativeai import caching
+        cached_content = caching.CachedContent.create(
+            model=model_name,
+            system_instruction=instruction,
+            ttl=datetime.timedelta(seconds=ttl_seconds)
+        )
+        return genai.GenerativeModel.from_cached_content(cached_content,
+                                                         generation_config=generation_config or None)
+
+    def system_instruction_model(self, model_name: str, generation_config: Dict[str, Any], instruction: str) -> Any:
+        """Model that sends the instruction as a system instruction with every request"""
+        import google.generativeai as genai
+        return genai.GenerativeModel(model_name, generation_config=generation_config or None,
+                                     system_instruction=instruction)
+
+
+class PrefixCache:
+    """
+    Routes prompts rendered from a registry template to a model bound to that template's static text
+
+    mode 'cached' registers the static text as cached content and falls back
+    to a system instruction when that fails (e.g. below the model's minimum
+    cacheable size); mode 'system' uses a system instruction directly. A
+    template that cannot be registered either way is remembered and its
+    prompts are sent whole.
+    """
+
+    def __init__(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None, mode: str = 'cached',
+                 ttl_seconds: int = 3600, backend: Optional[Any] = None,
+                 registry: Optional[PromptRegistry] = None):
+        if mode not in CONTEXT_CACHE_MODES[1:]:
+            raise ValueError(f"Unknown context cache mode '{mode}', expected 'system' or 'cached'")
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or GeminiContextBackend()
+        self.registry = registry
+        self.routed = 0
+        self.unrouted = 0
+        self.fallbacks = 0
+        # Static instruction -> (model or None, kind, expiry time)
+        self._models: Dict[str, Tuple[Any, Optional[str], float]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, instruction: str) -> Tuple[Any, Optional[str], float]:
+        if self.mode == 'cached':
+            try:
+                model = self.backend.cached_content_model(self.model_name, self.generation_config,
+                                                          instruction, self.ttl_seconds)
+                expires = time.time() + self.ttl_seconds - _EXPIRY_MARGIN_SECONDS
+                return model, 'cached_content', expires
+            except Exception:
+                self.fallbacks += 1
+        try:
+            model = self.backend.system_instruction_model(self.model_name, self.generation_config, instruction)
+            return model, 'system_instruction', float('inf')
+        except Exception:
+            self.fallbacks += 1
+            return None, None, float('inf')
+
+    def _model_for(self, template: CompiledTemplate) -> Any:
+        instruction = template.render(PAYLOAD_NOTE)
+        with self._lock:
+            entry = self._models.get(instruction)
+            if entry is None or time.time() >= entry[2]:
+                entry = self._register(instruction)
+                self._models[instruction] = entry
+            return entry[0]
+
+    def route(self, formatted_prompt: str) -> Optional[Tuple[Any, str]]:
+        """(model bound to the static text, payload text) for a template prompt, else None"""
+        registry = self.registry or get_registry()
+        for name in registry.names():
+            template = registry.get(name)
+            payload_text = template.split_payload(formatted_prompt)
+            if payload_text is None:
+                continue
+            model = self._model_for(template)
+            if model is not None:
+                self.routed += 1
+                return model, payload_text
+            break
+        self.unrouted += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        kinds = [kind for _, kind, _ in self._models.values() if kind is not None]
+        return {
+            'mode': self.mode,
+            'templates': {kind: kinds.count(kind) for kind in set(kinds)},
+            'routed': self.routed,
+            'unrouted': self.unrouted,
+            'fallbacks': self.fallbacks
+        }
+
+
+def prefix_cache_from_env(model_name: str, generation_config: Optional[Dict[str, Any]] = None) -> Optional[PrefixCache]:
+    """PrefixCache per GEMINI_CONTEXT_CACHE (off, system or cached) and GEMINI_CONTEXT_CACHE_TTL; None when off"""
+    mode = (os.getenv('GEMINI_CONTEXT_CACHE') or 'off').lower()
+    if mode == 'off':
+        return None
+    ttl_seconds = int(os.getenv('GEMINI_CONTEXT_CACHE_TTL') or 3600)
+    return PrefixCache(model_name, generation_config, mode=mode, ttl_seconds=ttl_seconds)
@@ -0,0 +1,82 @@
+"""
+Incremental format checking for streamed responses
+"""
+from typing import Any, Dict, Optional
+from collections import Counter
+from metrics.parsing import BULLET_SYMBOLS, strip_symbol
+from models.retry_policy import LatencyTracker
+
+
+TOO_MANY_BULLETS = 'too_many_bullets'
+BULLET_TOO_LONG = 'bullet_too_long'
+
+
+class FormatGuard:
+    """
+    Checks a response chunk by chunk against the bullet-count and length limits
+
+    Lines are classified with the same rule FormatComplianceMetric uses: a
+    line is a bullet if it starts with a bullet symbol, or is longer than
+    min_length characters and does not end with ':'. An unfinished line is
+    judged early only when it starts with a bullet symbol, since an unmarked
+    line could still turn out to be a header.
+    """
+
+    def __init__(self, max_bullets: int = 3, char_ceiling: int = 120, min_length: int = 10):
+        self.max_bullets = max_bullets
+        self.char_ceiling = char_ceiling
+        self.min_length = min_length
+        self.bullet_count = 0
+        self.abort_reason: Optional[str] = None
+        self._partial = ''
+
+    def _check_bullet(self, line: str, count: int) -> Optional[str]:
+        if count > self.max_bullets:
+            return TOO_MANY_BULLETS
+        if len(strip_symbol(line)) > self.char_ceiling:
+            return BULLET_TOO_LONG
+        return None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Consume a chunk; returns the abort reason once the output can no longer comply"""
+        if self.abort_reason is not None:
+            return self.abort_reason
+
+        *complete, self._partial = (self._partial + chunk).split('\n')
+        for line in complete:
+            line = line.strip()
+            if line.startswith(BULLET_SYMBOLS) or (len(line) > self.min_length and not line.endswith(':')):
+                self.bullet_count += 1
+                self.abort_reason = self._check_bullet(line, self.bullet_count)
+                if self.abort_reason is not None:
+                    return self.abort_reason
+
+        partial = self._partial.strip()
+        if partial.startswith(BULLET_SYMBOLS):
+            self.abort_reason = self._check_bullet(partial, self.bullet_count + 1)
+        return self.abort_reason
+
+
+class StreamStats:
+    """Time-to-first-token distribution and abort reasons across streamed calls"""
+
+    def __init__(self):
+        self.ttft = LatencyTracker()
+        self.streams = 0
+        self.abort_reasons: Counter = Counter()
+
+    def record(self, ttft: Optional[float], abort_reason: Optional[str]) -> None:
+        self.streams += 1
+        if ttft is not None:
+            self.ttft.record(ttft)
+        if abort_reason is not None:
+            self.abort_reasons[abort_reason] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'streams': self.streams,
+            'aborted': sum(self.abort_reasons.values()),
+            'abort_reasons': dict(self.abort_reasons),
+            'ttft_p50': self.ttft.percentile(50),
+            'ttft_p95': self.ttft.percentile(95)
+        }
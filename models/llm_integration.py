@@ -2,26 +2,272 @@
 LLM Model integration for DeepEval testing
 """
 import os
-import json
-import google.generativeai as genai
-from dotenv import load_dotenv
-from typing import Dict, Any
+import time
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from models.response_cache import ResponseCache, cache_from_env
+from models.rate_limiter import RateLimiter, estimate_tokens, get_rate_limiter, is_rate_limit_error
+from models.retry_policy import LatencyTracker, RetryPolicy, retry_policy_from_env
+from models.prompt_registry import DEFAULT_TEMPLATE, CompiledTemplate, compile_template, get_registry
+from models.packed_prompts import pack_prompt, split_packed_response
+from models.format_guard import FormatGuard, StreamStats
+from models.token_usage import TokenUsage, UsageLedger, current_usage
+from models.payload_format import payload_format_from_env, serialize_payload
+from models.context_cache import PrefixCache, prefix_cache_from_env
+from models.client_pool import get_client_pool
+from pipeline.tracing import configure as configure_tracing, span, traced
+from pipeline.dedup import PayloadDeduplicator
+from pipeline.results_sink import content_hash
 
-# Load environment variables
-load_dotenv()
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Load environment variables from .env once; deferred so importing this module stays cheap"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        # EVAL_TRACE may come from .env
+        configure_tracing()
+        _env_loaded = True
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text of a streamed chunk; chunks without text parts (e.g. a final safety chunk) give ''"""
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+
+def _cancel_stream(response: Any) -> None:
+    """Best-effort cancel of the underlying HTTP/gRPC stream after an early abort"""
+    cancel = getattr(getattr(response, '_iterator', None), 'cancel', None)
+    if callable(cancel):
+        cancel()
 
 class GeminiModel:
     """Wrapper for Google Gemini model integration"""
     
-    def __init__(self):
+    def __init__(self, generation_config: Optional[Dict[str, Any]] = None, use_cache: bool = True,
+                 rate_limiter: Optional[RateLimiter] = None, retry_policy: Optional[RetryPolicy] = None,
+                 hedge: Optional[bool] = None, pack_size: Optional[int] = None,
+                 stream: Optional[bool] = None, payload_format: Optional[str] = None,
+                 prefix_cache: Optional[PrefixCache] = None, dedup: Optional[bool] = None):
+        load_env()
         self.api_key = os.getenv('GEMINI_API_KEY')
         self.model_name = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
+        self.generation_config = generation_config or {}
+        self.retry_policy = retry_policy or retry_policy_from_env()
+        self.hedge = hedge if hedge is not None else os.getenv('GEMINI_HEDGE', '').lower() in ('1', 'true', 'yes')
+        self.latency = LatencyTracker()
+        
+        # Scenarios per request in generate_for_payloads; 1 sends each scenario separately
+        self.pack_size = max(1, pack_size or int(os.getenv('GEMINI_PACK_SIZE') or 1))
+        self.pack_stats = {'packed_requests': 0, 'packed_scenarios': 0, 'fallbacks': 0}
+        
+        # Streaming stops a response once it breaks the bullet-count or length limits
+        self.stream = stream if stream is not None else os.getenv('GEMINI_STREAM', '').lower() in ('1', 'true', 'yes')
+        self.stream_char_ceiling = int(os.getenv('GEMINI_STREAM_CHAR_CEILING') or 120)
+        self.stream_stats = StreamStats()
+        
+        # Data payload serialization in generate_for_payloads, see models/payload_format.py
+        self.payload_format = payload_format or payload_format_from_env()
+        
+        # Identical payloads in generate_for_payloads are generated once unless EVAL_DEDUP is off
+        if dedup is None:
+            dedup = os.getenv('EVAL_DEDUP', 'true').lower() in ('1', 'true', 'yes')
+        self.dedup: Optional[PayloadDeduplicator] = PayloadDeduplicator() if dedup else None
         
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(self.model_name)
+        # Shared per (api key, model, config), so connections outlive this instance
+        self.model = get_client_pool().get(self.api_key, self.model_name, self.generation_config)
+        
+        # Static template text registered once (GEMINI_CONTEXT_CACHE), so requests carry only the payload
+        self.prefix_cache = prefix_cache or prefix_cache_from_env(self.model_name, self.generation_config)
+        
+        # Responses are cached on disk unless bypassed here or via GEMINI_CACHE_BYPASS
+        self.cache: Optional[ResponseCache] = cache_from_env() if use_cache else None
+        
+        # One limiter per process by default, so every instance shares the same quota
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        
+        # Token usage for the whole run, and per payload of the last generate_for_payloads call
+        self.usage = UsageLedger()
+        self.last_usage: List[TokenUsage] = []
+    
+    def prompt_hash(self, template_name: str = DEFAULT_TEMPLATE) -> str:
+        """
+        Hash of what the model is sent for a payload, for keying stored results
+        
+        Covers the template text and the rendering config that changes the
+        request: payload format, context cache mode and, when streaming, the
+        early-abort ceiling (as the response cache key does). Changing any of
+        them invalidates stored outputs (pipeline.results_sink.record_key).
+        """
+        return content_hash({
+            'template': get_registry().get(template_name).text,
+            'payload_format': self.payload_format,
+            'context_cache': self.prefix_cache.mode if self.prefix_cache is not None else None,
+            'stream_char_ceiling': self.stream_char_ceiling if self.stream else None
+        })
+    
+    def _record_usage(self, response: Any, estimated: int) -> None:
+        usage = TokenUsage.from_response(response)
+        self.usage.record(usage)
+        self.rate_limiter.release(estimated_tokens=estimated, actual_tokens=usage.total_tokens or None)
+    
+    def _route(self, formatted_prompt: str) -> Tuple[Any, str]:
+        """Model and request contents: just the payload when the prompt's static text is context-cached"""
+        if self.prefix_cache is not None:
+            routed = self.prefix_cache.route(formatted_prompt)
+            if routed is not None:
+                return routed
+        return self.model, formatted_prompt
+    
+    def _generate_limited(self, formatted_prompt: str) -> str:
+        """Make one API call through the rate limiter, recording its latency"""
+        estimated = estimate_tokens(formatted_prompt)
+        with span('llm.rate_limit_wait'):
+            self.rate_limiter.acquire(estimated)
+        start = time.perf_counter()
+        try:
+            with span('llm.generate_content'):
+                if self.stream:
+                    text, response = self._stream(formatted_prompt)
+                else:
+                    model, contents = self._route(formatted_prompt)
+                    response = model.generate_content(contents)
+                    text = response.text
+        except Exception as e:
+            self.rate_limiter.release(success=False, rate_limited=is_rate_limit_error(e))
+            raise
+        self.latency.record(time.perf_counter() - start)
+        self._record_usage(response, estimated)
+        return text
+    
+    async def _agenerate_limited(self, formatted_prompt: str, started: Optional[asyncio.Event] = None,
+                                 stream: bool = False) -> str:
+        """Async counterpart of _generate_limited; sets started once the call leaves the limiter queue"""
+        estimated = estimate_tokens(formatted_prompt)
+        with span('llm.rate_limit_wait'):
+            await self.rate_limiter.aacquire(estimated)
+        if started is not None:
+            started.set()
+        start = time.perf_counter()
+        try:
+            with span('llm.generate_content'):
+                if stream:
+                    text, response = await self._astream(formatted_prompt)
+                else:
+                    model, contents = self._route(formatted_prompt)
+                    response = await model.generate_content_async(contents)
+                    text = response.text
+        except asyncio.CancelledError:
+            # Losing side of a hedge
+            self.rate_limiter.release(success=False)
+            raise
+        except Exception as e:
+            self.rate_limiter.release(success=False, rate_limited=is_rate_limit_error(e))
+            raise
+        self.latency.record(time.perf_counter() - start)
+        self._record_usage(response, estimated)
+        return text
+    
+    async def _agenerate_hedged(self, formatted_prompt: str, stream: bool = False) -> str:
+        """
+        Make a call and, if it runs past the observed p95 latency, race a duplicate against it
+        
+        Whichever copy succeeds first wins and the other is cancelled; if both
+        fail, the primary's error is raised.
+        """
+        hedge_after = self.latency.hedge_after() if self.hedge else None
+        if hedge_after is None:
+            return await self._agenerate_limited(formatted_prompt, stream=stream)
+        
+        started = asyncio.Event()
+        primary = asyncio.ensure_future(self._agenerate_limited(formatted_prompt, started, stream))
+        
+        # The hedge clock starts when the primary call is sent, not while it is queued
+        waiter = asyncio.ensure_future(started.wait())
+        await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+        
+        hedge = asyncio.ensure_future(self._agenerate_limited(formatted_prompt, stream=stream))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latency.record_hedge(won=task is hedge)
+                        return task.result()
+            self.latency.record_hedge(won=False)
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _cache_key(self, formatted_prompt: str, stream: bool = False) -> str:
+        config = self.generation_config
+        if stream:
+            # Early-aborted responses are truncated, so they must not be served to unguarded calls
+            config = dict(config, stream_char_ceiling=self.stream_char_ceiling)
+        if self.prefix_cache is not None:
+            # The static text is sent separately, which is a different request to the model
+            config = dict(config, context_cache=self.prefix_cache.mode)
+        return ResponseCache.make_key(self.model_name, config, formatted_prompt)
+    
+    def _stream(self, formatted_prompt: str) -> Tuple[str, Any]:
+        """Stream a response through a FormatGuard, stopping at the first format violation"""
+        guard = FormatGuard(char_ceiling=self.stream_char_ceiling)
+        start = time.perf_counter()
+        ttft = None
+        chunks = []
+        
+        model, contents = self._route(formatted_prompt)
+        response = model.generate_content(contents, stream=True)
+        for chunk in response:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            text = _chunk_text(chunk)
+            chunks.append(text)
+            if guard.feed(text) is not None:
+                _cancel_stream(response)
+                break
+        
+        self.stream_stats.record(ttft, guard.abort_reason)
+        return ''.join(chunks), response
+    
+    async def _astream(self, formatted_prompt: str) -> Tuple[str, Any]:
+        """Async counterpart of _stream"""
+        guard = FormatGuard(char_ceiling=self.stream_char_ceiling)
+        start = time.perf_counter()
+        ttft = None
+        chunks = []
+        
+        model, contents = self._route(formatted_prompt)
+        response = await model.generate_content_async(contents, stream=True)
+        async for chunk in response:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            text = _chunk_text(chunk)
+            chunks.append(text)
+            if guard.feed(text) is not None:
+                _cancel_stream(response)
+                break
+        
+        self.stream_stats.record(ttft, guard.abort_reason)
+        return ''.join(chunks), response
     
     def generate_response(self, prompt: str, data_payload: Dict[str, Any]) -> str:
         """
@@ -36,30 +282,310 @@ class GeminiModel:
         """
         try:
             # Format the prompt with data
-            formatted_prompt = prompt.format(data_payload=json.dumps(data_payload, indent=2))
+            formatted_prompt = render_prompt(prompt, data_payload, self.payload_format)
+        except Exception as e:
+            raise Exception(f"Error generating response: {str(e)}")
+        
+        return self.generate_from_prompt(formatted_prompt)
+    
+    def generate_from_prompt(self, formatted_prompt: str) -> str:
+        """
+        Generate response for a prompt that already contains its data payload
+        
+        Args:
+            formatted_prompt: Fully rendered prompt, e.g. from create_test_input
             
-            # Generate response
-            response = self.model.generate_content(formatted_prompt)
+        Returns:
+            Generated analysis response
+        """
+        try:
+            if self.cache is not None:
+                cache_key = self._cache_key(formatted_prompt, self.stream)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self.usage.record(TokenUsage(cached_calls=1))
+                    return cached
+            
+            # Generate response, retrying transient errors
+            text = self.retry_policy.call(lambda: self._generate_limited(formatted_prompt))
             
-            return response.text
+            if self.cache is not None:
+                self.cache.set(cache_key, text)
+            
+            return text
             
         except Exception as e:
             raise Exception(f"Error generating response: {str(e)}")
     
+    async def agenerate_response(self, prompt: str, data_payload: Dict[str, Any]) -> str:
+        """
+        Generate response using Gemini model without blocking the event loop
+        
+        Args:
+            prompt: The analysis prompt template
+            data_payload: Real estate data to analyze
+            
+        Returns:
+            Generated analysis response
+        """
+        try:
+            formatted_prompt = render_prompt(prompt, data_payload, self.payload_format)
+        except Exception as e:
+            raise Exception(f"Error generating response: {str(e)}")
+        
+        return await self.agenerate_from_prompt(formatted_prompt)
+    
+    async def agenerate_from_prompt(self, formatted_prompt: str, stream: Optional[bool] = None) -> str:
+        """
+        Async counterpart of generate_from_prompt
+        
+        stream overrides the instance setting, e.g. for packed prompts whose
+        combined answer is not subject to the single-scenario format limits.
+        """
+        stream = self.stream if stream is None else stream
+        try:
+            if self.cache is not None:
+                cache_key = self._cache_key(formatted_prompt, stream)
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    self.usage.record(TokenUsage(cached_calls=1))
+                    return cached
+            
+            text = await self.retry_policy.acall(lambda: self._agenerate_hedged(formatted_prompt, stream))
+            
+            if self.cache is not None:
+                await self.cache.aset(cache_key, text)
+            
+            return text
+            
+        except Exception as e:
+            raise Exception(f"Error generating response: {str(e)}")
+    
+    async def agenerate_batch(self, requests: List[Tuple[str, Dict[str, Any]]],
+                              max_concurrency: Optional[int] = None) -> List[str]:
+        """
+        Generate responses for many (prompt, data_payload) pairs concurrently
+        
+        Args:
+            requests: (prompt template, data payload) pairs to generate
+            max_concurrency: Optional cap on this batch's in-flight calls; by default
+                the shared rate limiter's adaptive concurrency limit applies
+            
+        Returns:
+            Generated responses in the same order as requests
+        """
+        try:
+            formatted_prompts = [render_prompt(prompt, data, self.payload_format) for prompt, data in requests]
+        except Exception as e:
+            raise Exception(f"Error generating response: {str(e)}")
+        
+        return await self.agenerate_batch_from_prompts(formatted_prompts, max_concurrency)
+    
+    async def agenerate_batch_from_prompts(self, formatted_prompts: List[str],
+                                           max_concurrency: Optional[int] = None) -> List[str]:
+        """Generate responses for already-rendered prompts concurrently, in input order"""
+        if not max_concurrency:
+            return await asyncio.gather(*(self.agenerate_from_prompt(formatted_prompt)
+                                          for formatted_prompt in formatted_prompts))
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def _generate(formatted_prompt: str) -> str:
+            async with semaphore:
+                return await self.agenerate_from_prompt(formatted_prompt)
+        
+        return await asyncio.gather(*(_generate(formatted_prompt) for formatted_prompt in formatted_prompts))
+    
+    def generate_batch(self, requests: List[Tuple[str, Dict[str, Any]]],
+                       max_concurrency: Optional[int] = None) -> List[str]:
+        """Synchronous entry point for agenerate_batch, for use from the evaluation scripts"""
+        return get_client_pool().run(self.agenerate_batch(requests, max_concurrency))
+    
+    def generate_batch_from_prompts(self, formatted_prompts: List[str],
+                                    max_concurrency: Optional[int] = None) -> List[str]:
+        """Synchronous entry point for agenerate_batch_from_prompts"""
+        return get_client_pool().run(self.agenerate_batch_from_prompts(formatted_prompts, max_concurrency))
+    
+    async def agenerate_for_payloads(self, data_payloads: List[Dict[str, Any]],
+                                     template_name: str = DEFAULT_TEMPLATE,
+                                     prompts: Optional[List[str]] = None) -> List[str]:
+        """
+        Generate one response per data payload, packing up to pack_size payloads per request
+        
+        Payloads are de-duplicated first (unless disabled): payloads with the same
+        canonical hash are generated once and the output is fanned out to every
+        scenario that referenced it, including duplicates of recent earlier batches.
+        
+        In packed mode each request carries the template once plus several
+        payloads and asks for one delimited section per scenario. Sections that
+        are missing or unparseable, and packs whose request fails, are
+        regenerated with single-scenario prompts.
+        
+        Args:
+            data_payloads: Real estate data to analyze
+            template_name: Prompt template in the registry
+            prompts: Single-scenario prompts already rendered for data_payloads with
+                this template and payload_format (e.g. the test case inputs), sent
+                as they are instead of being rendered again
+            
+        Returns:
+            Generated responses in the same order as data_payloads
+        """
+        template = get_registry().get(template_name)
+        usages = [TokenUsage() for _ in data_payloads]
+        
+        if self.dedup is None:
+            outputs = await self._agenerate_payloads(data_payloads, template, usages, prompts)
+            self.last_usage = usages
+            return outputs
+        
+        # Same prompt template and serialization, so equal keys mean identical requests
+        scope = f"{content_hash(template.text)[:16]}:{self.payload_format}"
+        keys = self.dedup.keys(data_payloads, scope)
+        outputs: List[Optional[str]] = [None] * len(data_payloads)
+        pending: Dict[str, List[int]] = {}
+        for index, key in enumerate(keys):
+            outputs[index] = self.dedup.recall(key)
+            if outputs[index] is None:
+                pending.setdefault(key, []).append(index)
+        
+        # Usage is charged to the first scenario of each group; its duplicates cost nothing
+        first = [indices[0] for indices in pending.values()]
+        generated = await self._agenerate_payloads([data_payloads[index] for index in first], template,
+                                                   [usages[index] for index in first],
+                                                   [prompts[index] for index in first] if prompts else None)
+        for (key, indices), output in zip(pending.items(), generated):
+            self.dedup.remember(key, output)
+            for index in indices:
+                outputs[index] = output
+        
+        self.dedup.record(len(data_payloads), len(first))
+        self.last_usage = usages
+        return outputs
+    
+    async def _agenerate_payloads(self, data_payloads: List[Dict[str, Any]], template: CompiledTemplate,
+                                  usages: List[TokenUsage], prompts: Optional[List[str]] = None) -> List[str]:
+        """Generate for payloads, unpacked or packed, charging each payload's calls to its usage"""
+        prompts = prompts or [None] * len(data_payloads)
+        
+        async def _generate_one(data_payload: Dict[str, Any], prompt: Optional[str], usage: TokenUsage) -> str:
+            # Runs as its own task, so calls made here are charged to this payload only
+            current_usage.set(usage)
+            if prompt is None:
+                prompt = template.render(serialize_payload(data_payload, self.payload_format))
+            return await self.agenerate_from_prompt(prompt)
+        
+        if self.pack_size <= 1:
+            return await asyncio.gather(*(_generate_one(data_payload, prompt, usage)
+                                          for data_payload, prompt, usage in zip(data_payloads, prompts, usages)))
+        
+        async def _generate_pack(pack: List[Dict[str, Any]], pack_prompts: List[Optional[str]],
+                                 pack_usages: List[TokenUsage]) -> List[str]:
+            pack_usage = TokenUsage()
+            current_usage.set(pack_usage)
+            try:
+                packed_output = await self.agenerate_from_prompt(pack_prompt(template, pack, self.payload_format),
+                                                                 stream=False)
+                sections = split_packed_response(packed_output, len(pack))
+            except Exception:
+                sections = [None] * len(pack)
+            
+            self.pack_stats['packed_requests'] += 1
+            self.pack_stats['packed_scenarios'] += len(pack)
+            
+            # The packed request is shared evenly; fallbacks are charged to their own scenario
+            for usage, share in zip(pack_usages, pack_usage.split(len(pack))):
+                usage.add(share)
+            
+            async def _section(data_payload: Dict[str, Any], prompt: Optional[str], section: Optional[str],
+                               usage: TokenUsage) -> str:
+                if section is not None:
+                    return section
+                self.pack_stats['fallbacks'] += 1
+                return await _generate_one(data_payload, prompt, usage)
+            
+            return await asyncio.gather(*(_section(data_payload, prompt, section, usage)
+                                          for data_payload, prompt, section, usage
+                                          in zip(pack, pack_prompts, sections, pack_usages)))
+        
+        starts = range(0, len(data_payloads), self.pack_size)
+        results = await asyncio.gather(*(_generate_pack(data_payloads[start:start + self.pack_size],
+                                                        prompts[start:start + self.pack_size],
+                                                        usages[start:start + self.pack_size])
+                                         for start in starts))
+        return [output for pack_outputs in results for output in pack_outputs]
+    
+    def generate_for_payloads(self, data_payloads: List[Dict[str, Any]],
+                              template_name: str = DEFAULT_TEMPLATE,
+                              prompts: Optional[List[str]] = None) -> List[str]:
+        """Synchronous entry point for agenerate_for_payloads"""
+        return get_client_pool().run(self.agenerate_for_payloads(data_payloads, template_name, prompts))
+    
     def __call__(self, prompt: str) -> str:
         """Make the class callable for deepeval compatibility"""
         return self.generate_response(prompt, {})
 
 
-def load_prompt_template() -> str:
+_default_model: Optional[GeminiModel] = None
+_default_model_lock = threading.Lock()
+
+
+def get_gemini_model() -> GeminiModel:
+    """Process-wide GeminiModel configured from the environment, shared by the evaluation entry points"""
+    global _default_model
+    with _default_model_lock:
+        if _default_model is None:
+            _default_model = GeminiModel()
+        return _default_model
+
+
+@traced('prompt.load_template')
+def load_prompt_template(name: str = DEFAULT_TEMPLATE) -> str:
     """Load the real estate analysis prompt template"""
-    prompt_path = "prompts/real_estate_analysis_prompt.txt"
-    
-    with open(prompt_path, 'r', encoding='utf-8') as file:
-        return file.read()
+    return get_registry().get(name).text
+
+
+@traced('prompt.render')
+def render_prompt(prompt_template: str, data_payload: Dict[str, Any], payload_format: Optional[str] = None) -> str:
+    """Render a template string with a data payload, reusing its compiled split"""
+    return compile_template(prompt_template).render(serialize_payload(data_payload, payload_format))
+
 
+@traced('prompt.create_test_input')
+def create_test_input(data_payload: Dict[str, Any], template_name: str = DEFAULT_TEMPLATE,
+                      payload_format: Optional[str] = None) -> str:
+    """Create formatted test input with data payload, serialized per payload_format (default EVAL_PAYLOAD_FORMAT)"""
+    return get_registry().get(template_name).render(serialize_payload(data_payload, payload_format))
 
-def create_test_input(data_payload: Dict[str, Any]) -> str:
-    """Create formatted test input with data payload"""
-    prompt_template = load_prompt_template()
-    return prompt_template.format(data_payload=json.dumps(data_payload, indent=2))
+
+def print_generation_stats(gemini_model: GeminiModel) -> None:
+    """Print cache, rate limiter, latency, streaming and token usage stats after a run's generation"""
+    if gemini_model.cache is not None:
+        stats = gemini_model.cache.stats()
+        print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses")
+    
+    limiter = gemini_model.rate_limiter.stats()
+    print(f"Rate limiter: {limiter['requests_per_minute']:.0f} req/min, "
+          f"concurrency {limiter['concurrency_limit']}, {limiter['throttled']} throttled")
+    latency = gemini_model.latency.stats()
+    if latency['calls']:
+        print(f"Latency: p50 {latency['p50']:.2f}s, p95 {latency['p95']:.2f}s, p99 {latency['p99']:.2f}s, "
+              f"{latency['hedges']} hedges ({latency['hedge_win_rate']:.0%} won)")
+    if gemini_model.stream:
+        streamed = gemini_model.stream_stats.stats()
+        if streamed['streams']:
+            print(f"Streaming: {streamed['aborted']}/{streamed['streams']} aborted early {streamed['abort_reasons']}, "
+                  f"time to first token p50 {streamed['ttft_p50']:.2f}s")
+    if gemini_model.prefix_cache is not None:
+        context = gemini_model.prefix_cache.stats()
+        print(f"Context cache ({context['mode']}): {context['routed']} requests sent payload only, "
+              f"{context['unrouted']} sent whole, registered {context['templates']}, {context['fallbacks']} fallbacks")
+    
+    if gemini_model.dedup is not None:
+        dedup = gemini_model.dedup.stats()
+        print(f"Dedup: {dedup['scenarios']} scenarios, {dedup['generated']} generated, "
+              f"{dedup['duplicates']} served from duplicates ({dedup['dedup_ratio']:.0%} dedup ratio)")
+    
+    usage = gemini_model.usage.total
+    print(f"Tokens: {usage.prompt_tokens} prompt + {usage.candidate_tokens} candidate = {usage.total_tokens} "
+          f"over {usage.calls} calls ({usage.cached_calls} served from cache)")
@@ -0,0 +1,62 @@
+"""
+Packing several scenarios into one prompt and splitting the answer back out
+"""
+import re
+from typing import Any, Dict, List, Optional
+from models.prompt_registry import CompiledTemplate
+from models.payload_format import serialize_payload
+
+
+PACKING_INSTRUCTIONS = """
+
+Packed Request:
+
+The Data Payload above contains {count} independent scenarios. Apply the Task, Analytical Framework and Format to each scenario separately, as if it were the only one.
+
+Answer each scenario in its own section, in order, starting each section with a line containing only "=== SCENARIO k ===" where k is the scenario number (1 to {count}). Write nothing outside the sections.
+"""
+
+_SECTION_MARKER = re.compile(r'^[\s#=*]*SCENARIO\s+(\d+)[\s#=*:]*$', re.IGNORECASE | re.MULTILINE)
+_END_MARKER = re.compile(r'^[\s#=*]*END\s+(?:OF\s+)?SCENARIO.*$', re.IGNORECASE | re.MULTILINE)
+
+
+def pack_payloads(data_payloads: List[Dict[str, Any]], payload_format: Optional[str] = None) -> str:
+    """Serialize payloads as one numbered Data Payload block"""
+    return '\n\n'.join(
+        f"Scenario {index}:\n{serialize_payload(data_payload, payload_format)}"
+        for index, data_payload in enumerate(data_payloads, 1)
+    )
+
+
+def pack_prompt(template: CompiledTemplate, data_payloads: List[Dict[str, Any]],
+                payload_format: Optional[str] = None) -> str:
+    """Render one prompt that asks for a delimited answer section per payload"""
+    return template.render(pack_payloads(data_payloads, payload_format)) + PACKING_INSTRUCTIONS.format(count=len(data_payloads))
+
+
+def split_packed_response(text: str, count: int) -> List[Optional[str]]:
+    """
+    Split a packed response into per-scenario outputs
+
+    Returns:
+        count entries in scenario order; None for a section that is missing,
+        empty or duplicated, so the caller can regenerate just that scenario
+    """
+    sections: List[Optional[str]] = [None] * count
+    seen = set()
+    markers = list(_SECTION_MARKER.finditer(text))
+
+    for position, marker in enumerate(markers):
+        index = int(marker.group(1)) - 1
+        end = markers[position + 1].start() if position + 1 < len(markers) else len(text)
+        body = _END_MARKER.split(text[marker.end():end], maxsplit=1)[0].strip()
+
+        if not 0 <= index < count:
+            continue
+        if index in seen:
+            sections[index] = None
+            continue
+        seen.add(index)
+        sections[index] = body or None
+
+    return sections
@@ -0,0 +1,127 @@
+"""
+Payload serializers for the prompt's Data Payload section
+
+The default 'json' mode is the original indented JSON. The other modes trade
+whitespace and repeated keys for fewer prompt tokens:
+
+    compact      JSON without indentation or spaces after separators
+    abbreviated  compact JSON with known schema keys shortened, preceded by a legend
+    tabular      compact JSON with homogeneous lists of records moved into CSV tables
+"""
+import io
+import os
+import csv
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PAYLOAD_FORMATS = ('json', 'compact', 'abbreviated', 'tabular')
+
+# Short codes for the keys of the data/test_data.py schema; other keys are kept as is
+KEY_ABBREVIATIONS = {
+    'unitData': 'u',
+    'address': 'addr',
+    'floor': 'fl',
+    'stack': 'stk',
+    'config': 'cfg',
+    'orientation': 'ori',
+    'pricingData': 'pr',
+    'currentListing': 'cur',
+    'askingPrice': 'ask',
+    'projectData': 'prj',
+    'name': 'nm',
+    'neighborhood': 'nbh',
+    'completionYear': 'yr',
+    'tenure': 'ten',
+    'amenities': 'amen',
+    'pois': 'poi',
+    'type': 'typ',
+    'walkingDurationMins': 'walk',
+    'marketContext': 'mkt',
+    'competitiveListings': 'lst',
+    'askingPsf': 'apsf',
+    'daysOnMarket': 'dom',
+    'pastTransactions': 'txn',
+    'transactedPsf': 'tpsf',
+    'saleDate': 'date',
+}
+
+_COMPACT = (',', ':')
+
+
+def payload_format_from_env() -> str:
+    return os.getenv('EVAL_PAYLOAD_FORMAT') or 'json'
+
+
+def _abbreviate(value: Any, used: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        abbreviated = {}
+        for key, item in value.items():
+            short = KEY_ABBREVIATIONS.get(key, key)
+            if short != key:
+                used[short] = key
+            abbreviated[short] = _abbreviate(item, used)
+        return abbreviated
+    if isinstance(value, list):
+        return [_abbreviate(item, used) for item in value]
+    return value
+
+
+def _is_table(value: Any) -> bool:
+    """Two or more records with the same keys and only scalar values"""
+    if not isinstance(value, list) or len(value) < 2 or not all(isinstance(item, dict) for item in value):
+        return False
+    columns = list(value[0])
+    return all(
+        list(item) == columns and not any(isinstance(cell, (dict, list)) for cell in item.values())
+        for item in value
+    )
+
+
+def _extract_tables(value: Any, path: str, tables: List[Tuple[str, List[Dict[str, Any]]]]) -> Any:
+    if _is_table(value):
+        tables.append((path, value))
+        return f"<table {path}>"
+    if isinstance(value, dict):
+        return {key: _extract_tables(item, f"{path}.{key}" if path else key, tables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_extract_tables(item, f"{path}[{index}]", tables) for index, item in enumerate(value)]
+    return value
+
+
+def _csv(rows: List[Dict[str, Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(rows[0])
+    writer.writerows(row.values() for row in rows)
+    return buffer.getvalue().rstrip('\n')
+
+
+def serialize_payload(data_payload: Dict[str, Any], payload_format: Optional[str] = None) -> str:
+    """
+    Serialize a data payload for the prompt
+
+    Args:
+        data_payload: Real estate data to analyze
+        payload_format: One of PAYLOAD_FORMATS; defaults to EVAL_PAYLOAD_FORMAT, else 'json'
+
+    Raises:
+        ValueError: For an unknown payload format
+    """
+    payload_format = payload_format or payload_format_from_env()
+
+    if payload_format == 'json':
+        return json.dumps(data_payload, indent=2)
+    if payload_format == 'compact':
+        return json.dumps(data_payload, separators=_COMPACT)
+    if payload_format == 'abbreviated':
+        used: Dict[str, str] = {}
+        body = json.dumps(_abbreviate(data_payload, used), separators=_COMPACT)
+        legend = ', '.join(f"{short}={key}" for short, key in used.items())
+        return f"Keys: {legend}\n{body}" if used else body
+    if payload_format == 'tabular':
+        tables: List[Tuple[str, List[Dict[str, Any]]]] = []
+        body = json.dumps(_extract_tables(data_payload, '', tables), separators=_COMPACT)
+        return '\n\n'.join([body] + [f"{path} (CSV):\n{_csv(rows)}" for path, rows in tables])
+
+    raise ValueError(f"Unknown payload format '{payload_format}', expected one of {', '.join(PAYLOAD_FORMATS)}")
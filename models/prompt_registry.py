@@ -0,0 +1,118 @@
+"""
+Compiled prompt template registry with mtime-based reloading
+"""
+import os
+from string import Formatter
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+PROMPTS_DIR = "prompts"
+DEFAULT_TEMPLATE = "real_estate_analysis_prompt"
+PAYLOAD_FIELD = "data_payload"
+
+
+class CompiledTemplate:
+    """Prompt template pre-split around its {data_payload} placeholders"""
+
+    def __init__(self, text: str, name: str = "", path: Optional[str] = None, mtime: float = 0.0):
+        self.text = text
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self._segments = self._split(text)
+
+    @staticmethod
+    def _split(text: str) -> List[str]:
+        """
+        Split the template into literal segments between payload fields
+
+        Uses the same parser as str.format, so escaped braces render identically
+        and unknown fields fail with the same KeyError.
+        """
+        segments = []
+        current = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(text):
+            current.append(literal)
+            if field_name is None:
+                continue
+            if field_name != PAYLOAD_FIELD or format_spec or conversion:
+                raise KeyError(field_name)
+            segments.append(''.join(current))
+            current = []
+        segments.append(''.join(current))
+        return segments
+
+    def render(self, payload_text: str) -> str:
+        """Render the template with an already-serialized payload"""
+        return payload_text.join(self._segments)
+
+    @property
+    def single_payload(self) -> bool:
+        """Whether the template has exactly one payload field, so it splits into a static prefix and suffix"""
+        return len(self._segments) == 2
+
+    def split_payload(self, formatted_prompt: str) -> Optional[str]:
+        """
+        The payload text of a prompt rendered from this template, or None if it was not
+
+        Only single-payload templates can be split this way.
+        """
+        if not self.single_payload:
+            return None
+        prefix, suffix = self._segments
+        if (len(formatted_prompt) < len(prefix) + len(suffix) or not formatted_prompt.startswith(prefix)
+                or not formatted_prompt.endswith(suffix)):
+            return None
+        return formatted_prompt[len(prefix):len(formatted_prompt) - len(suffix)]
+
+
+@lru_cache(maxsize=32)
+def compile_template(text: str) -> CompiledTemplate:
+    """Compile raw template text, memoized so repeated calls with the same string are free"""
+    return CompiledTemplate(text)
+
+
+class PromptRegistry:
+    """Loads every template in a directory once and reloads a file only when its mtime changes"""
+
+    def __init__(self, directory: str = PROMPTS_DIR):
+        self.directory = directory
+        self._templates: Dict[str, CompiledTemplate] = {}
+
+        if os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith('.txt'):
+                    self._load(filename[:-len('.txt')])
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def _load(self, name: str) -> CompiledTemplate:
+        path = self._path(name)
+        mtime = os.stat(path).st_mtime
+        with open(path, 'r', encoding='utf-8') as file:
+            template = CompiledTemplate(file.read(), name=name, path=path, mtime=mtime)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str = DEFAULT_TEMPLATE) -> CompiledTemplate:
+        """Return the compiled template, reloading it if the file changed on disk"""
+        template = self._templates.get(name)
+        if template is None or os.stat(template.path).st_mtime != template.mtime:
+            template = self._load(name)
+        return template
+
+    def names(self) -> List[str]:
+        return sorted(self._templates)
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_registry() -> PromptRegistry:
+    """Process-wide registry for the prompts/ directory"""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry()
+    return _registry
@@ -0,0 +1,207 @@
+"""
+Client-side rate limiting and adaptive concurrency for Gemini calls
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+# Substrings that identify quota / rate-limit failures across SDK versions
+RATE_LIMIT_MARKERS = ('429', 'resource exhausted', 'resource_exhausted', 'quota', 'rate limit')
+
+# Poll interval for callers waiting on a concurrency slot
+_SLOT_POLL_SECONDS = 0.05
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for 429 / ResourceExhausted errors, matched by type name, status code or message"""
+    if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    if getattr(error, 'code', None) == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt token count (~4 characters per token) for the tokens/min bucket"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding up to one minute of budget
+
+    A rate of 0 disables the bucket. Requests larger than the capacity are
+    admitted once the bucket is full so they cannot block forever.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = rate_per_minute
+        self.available = rate_per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self.available = min(self.capacity, self.available + elapsed * self.rate_per_minute / 60.0)
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken; 0 means it can be taken now"""
+        if self.rate_per_minute <= 0:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) * 60.0 / self.rate_per_minute
+
+    def take(self, amount: float) -> None:
+        if self.rate_per_minute > 0:
+            self.available -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) a correction once the real cost is known"""
+        if self.rate_per_minute > 0:
+            self.available = min(self.capacity, self.available - amount)
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min buckets plus AIMD adaptive concurrency
+
+    The concurrency limit grows by one slot per limit's worth of successful
+    calls (additive increase) and halves on a rate-limit error (multiplicative
+    decrease), which also pauses new calls for cooldown_seconds. State is
+    guarded by a threading lock so the limiter can be shared by sync callers,
+    worker threads and any number of event loops.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 initial_concurrency: int = 8, min_concurrency: int = 1,
+                 max_concurrency: int = 64, cooldown_seconds: float = 5.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency_limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.cooldown_seconds = cooldown_seconds
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.throttled = 0
+        self._cooldown_until = 0.0
+        self._started = deque()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take a slot and budget if possible; otherwise return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            if self.in_flight >= int(self.concurrency_limit):
+                return _SLOT_POLL_SECONDS
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self._started.append(now)
+            return 0.0
+
+    def acquire(self, tokens: int = 1) -> None:
+        """Block until a call may start"""
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait <= 0:
+                    return
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    async def aacquire(self, tokens: int = 1) -> None:
+        """Wait without blocking the event loop until a call may start"""
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def release(self, success: bool = True, rate_limited: bool = False,
+                estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        """
+        Finish a call started with acquire/aacquire and adapt the concurrency limit
+
+        Args:
+            success: Whether the call succeeded
+            rate_limited: Whether it failed with a 429 / resource-exhausted error
+            estimated_tokens: Tokens charged at acquire time
+            actual_tokens: Real usage when known, to correct the tokens/min bucket
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if actual_tokens is not None:
+                self.tokens.adjust(actual_tokens - estimated_tokens)
+            if rate_limited:
+                self.throttled += 1
+                self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2)
+                self._cooldown_until = time.monotonic() + self.cooldown_seconds
+            elif success:
+                self.concurrency_limit = min(float(self.max_concurrency),
+                                             self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+    def current_rate(self) -> float:
+        """Calls started over the last minute"""
+        with self._lock:
+            cutoff = time.monotonic() - 60.0
+            while self._started and self._started[0] < cutoff:
+                self._started.popleft()
+            return float(len(self._started))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests_per_minute': self.current_rate(),
+            'concurrency_limit': int(self.concurrency_limit),
+            'in_flight': self.in_flight,
+            'queue_depth': self.waiting,
+            'throttled': self.throttled
+        }
+
+
+def limiter_from_env() -> RateLimiter:
+    """Build a rate limiter from GEMINI_RPM / GEMINI_TPM and the concurrency settings"""
+    return RateLimiter(
+        requests_per_minute=float(os.getenv('GEMINI_RPM') or 0),
+        tokens_per_minute=float(os.getenv('GEMINI_TPM') or 0),
+        initial_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY') or 8),
+        max_concurrency=int(os.getenv('GEMINI_CONCURRENCY_CEILING') or 64)
+    )
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every GeminiModel"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = limiter_from_env()
+        return _limiter
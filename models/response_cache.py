@@ -0,0 +1,191 @@
+"""
+Persistent on-disk cache for LLM responses
+"""
+import os
+import json
+import time
+import atexit
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+from pipeline.tracing import traced
+
+
+DEFAULT_CACHE_PATH = ".deepeval/response_cache.db"
+
+# Hits whose access times are buffered before they are written in one transaction
+TOUCH_FLUSH_SIZE = 256
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache keyed by a hash of model, config and prompt
+
+    Hits only buffer their access time; buffered times are written together
+    with the next insert, every TOUCH_FLUSH_SIZE hits, before an eviction and
+    at exit, so a hit costs no commit. Size-based eviction runs once per
+    evict_every inserts (a twentieth of max_entries), so the table may exceed
+    max_entries by that much between evictions. The async methods run the
+    SQLite work in a thread, off the event loop.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: Optional[int] = None,
+                 max_age_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evict_every = max(1, (max_entries or 0) // 20)
+        self._inserts_since_evict = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+        self.evict()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(model_name: str, generation_config: Dict[str, Any], formatted_prompt: str) -> str:
+        """Content-address a generation by model name, generation config and full prompt"""
+        material = json.dumps([model_name, generation_config, formatted_prompt], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    @traced('cache.get')
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.max_age_seconds is not None and now - row[1] > self.max_age_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._write_touched()
+                self._conn.commit()
+            return row[0]
+
+    @traced('cache.set')
+    def set(self, key: str, response: str) -> None:
+        """Store a response, along with buffered access times, and evict every evict_every inserts"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._touched.pop(key, None)
+            self._write_touched()
+            self._conn.commit()
+            self._inserts_since_evict += 1
+            due = self.max_entries is not None and self._inserts_since_evict >= self.evict_every
+
+        if due:
+            self.evict()
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get without blocking the event loop"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, response: str) -> None:
+        """set without blocking the event loop"""
+        await asyncio.to_thread(self.set, key, response)
+
+    def _write_touched(self) -> None:
+        # Caller holds the lock and commits
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def flush(self) -> None:
+        """Write buffered access times"""
+        with self._lock:
+            if self._touched:
+                self._write_touched()
+                self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used entries beyond max_entries"""
+        removed = 0
+        with self._lock:
+            # Recency must include buffered hits
+            self._write_touched()
+            self._inserts_since_evict = 0
+            if self.max_age_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+                )
+                removed += cursor.rowcount
+
+            if self.max_entries is not None:
+                # Everything older than the max_entries-th most recent access, found via the index
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE accessed_at < "
+                    "(SELECT accessed_at FROM responses ORDER BY accessed_at DESC LIMIT 1 OFFSET ?)",
+                    (max(0, self.max_entries - 1),)
+                )
+                removed += cursor.rowcount
+
+            self._conn.commit()
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current entry count"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self)
+        }
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """Build the response cache from environment settings, or None when bypassed"""
+    if os.getenv('GEMINI_CACHE_BYPASS', '').lower() in ('1', 'true', 'yes'):
+        return None
+
+    max_entries = os.getenv('GEMINI_CACHE_MAX_ENTRIES')
+    max_age_days = os.getenv('GEMINI_CACHE_MAX_AGE_DAYS')
+
+    return ResponseCache(
+        path=os.getenv('GEMINI_CACHE_PATH', DEFAULT_CACHE_PATH),
+        max_entries=int(max_entries) if max_entries else None,
+        max_age_seconds=float(max_age_days) * 86400 if max_age_days else None
+    )
@@ -0,0 +1,139 @@
+"""
+Retry policy and latency tracking for Gemini calls
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from models.rate_limiter import is_rate_limit_error
+
+
+T = TypeVar('T')
+
+# Exception type names the google SDKs raise for transient server-side failures
+RETRYABLE_ERROR_TYPES = (
+    'ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded', 'GatewayTimeout',
+    'BadGateway', 'Aborted', 'ServerError', 'TimeoutError', 'ConnectionError'
+)
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """True for rate limits, timeouts, connection failures and 5xx responses"""
+    if is_rate_limit_error(error):
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_TYPES:
+        return True
+    if getattr(error, 'code', None) in RETRYABLE_STATUS_CODES:
+        return True
+    # google.api_core errors render as "<status code> <message>"
+    status = str(error).split(' ', 1)[0]
+    return status.isdigit() and int(status) in RETRYABLE_STATUS_CODES
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter
+
+    Attempt n (0-based) that fails with a retryable error waits a uniform
+    random time in [0, min(max_delay, base_delay * 2**n)] before the next one,
+    so concurrent callers hitting the same failure do not retry in lockstep.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 30.0,
+                 classifier: Callable[[BaseException], bool] = is_retryable_error):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.classifier = classifier
+        self.retries = 0
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt + 1 < self.max_attempts and self.classifier(error)
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run fn, retrying retryable errors; the last error is re-raised"""
+        for attempt in range(self.max_attempts):
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                self.retries += 1
+                time.sleep(self.delay(attempt))
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async counterpart of call; fn is invoked afresh for every attempt"""
+        for attempt in range(self.max_attempts):
+            try:
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.delay(attempt))
+
+
+def retry_policy_from_env() -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=int(os.getenv('GEMINI_RETRY_MAX_ATTEMPTS') or 5),
+        base_delay=float(os.getenv('GEMINI_RETRY_BASE_DELAY') or 1.0),
+        max_delay=float(os.getenv('GEMINI_RETRY_MAX_DELAY') or 30.0)
+    )
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful call latencies plus hedging counters
+
+    hedge_after() returns the observed p95 once min_samples calls have been
+    seen, and None before that so hedging never fires on a cold start.
+    """
+
+    def __init__(self, window: int = 1000, min_samples: int = 20):
+        self.min_samples = min_samples
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def record_hedge(self, won: bool) -> None:
+        with self._lock:
+            self.hedges += 1
+            self.hedge_wins += 1 if won else 0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(0, min(len(samples) - 1, int(round(pct / 100.0 * len(samples))) - 1))
+        return samples[rank]
+
+    def hedge_after(self) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        return self.percentile(95)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': len(self._samples),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'hedges': self.hedges,
+            'hedge_win_rate': self.hedge_wins / self.hedges if self.hedges else 0.0
+        }
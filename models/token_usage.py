@@ -0,0 +1,70 @@
+"""
+Token accounting from Gemini usage metadata
+"""
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+
+class TokenUsage:
+    """Prompt / candidate token counts and API calls, summed over one or more calls"""
+
+    __slots__ = ('prompt_tokens', 'candidate_tokens', 'total_tokens', 'calls', 'cached_calls')
+
+    def __init__(self, prompt_tokens: int = 0, candidate_tokens: int = 0, total_tokens: int = 0,
+                 calls: int = 0, cached_calls: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.candidate_tokens = candidate_tokens
+        self.total_tokens = total_tokens
+        self.calls = calls
+        self.cached_calls = cached_calls
+
+    def add(self, other: 'TokenUsage') -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.candidate_tokens += other.candidate_tokens
+        self.total_tokens += other.total_tokens
+        self.calls += other.calls
+        self.cached_calls += other.cached_calls
+
+    def split(self, parts: int) -> List['TokenUsage']:
+        """Divide evenly, e.g. a packed request across its scenarios; remainders go to the first parts"""
+        shares = []
+        for index in range(parts):
+            def share(value: int) -> int:
+                return value // parts + (1 if index < value % parts else 0)
+            shares.append(TokenUsage(share(self.prompt_tokens), share(self.candidate_tokens),
+                                     share(self.total_tokens), share(self.calls), share(self.cached_calls)))
+        return shares
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_response(cls, response: Any) -> 'TokenUsage':
+        """Usage of one API call; counts missing from the response are 0"""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        candidate_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        total_tokens = getattr(usage, 'total_token_count', 0) or prompt_tokens + candidate_tokens
+        return cls(prompt_tokens, candidate_tokens, total_tokens, calls=1)
+
+
+# Usage of the scenario being generated in the current task, if any; asyncio
+# tasks copy it, so retries, hedges and fallbacks are charged to their scenario
+current_usage: ContextVar[Optional[TokenUsage]] = ContextVar('current_usage', default=None)
+
+
+class UsageLedger:
+    """Thread-safe run total of token usage"""
+
+    def __init__(self):
+        self.total = TokenUsage()
+        self._lock = threading.Lock()
+
+    def record(self, usage: TokenUsage) -> None:
+        """Charge a call to the run total and to the current scenario, if one is being tracked"""
+        with self._lock:
+            self.total.add(usage)
+            scenario_usage = current_usage.get()
+            if scenario_usage is not None:
+                scenario_usage.add(usage)
@@ -0,0 +1,186 @@
+"""
+Run-level token / call budgets and a priority-ordered, budget-aware batch scheduler
+"""
+import os
+import heapq
+from itertools import count, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from models.token_usage import TokenUsage
+from models.rate_limiter import estimate_tokens
+from models.llm_integration import create_test_input
+
+# Output tokens assumed per scenario until real usage has been observed
+DEFAULT_OUTPUT_TOKENS = 150
+
+# Scenarios in the first batch of a limited run, so later batches are sized from real usage
+PROBE_BATCH_SIZE = 8
+
+
+class RunBudget:
+    """Upper bounds on the tokens and API calls a run may spend; None means unbounded"""
+
+    def __init__(self, max_tokens: Optional[int] = None, max_calls: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self.max_calls = max_calls
+        self.spent = TokenUsage()
+
+    @property
+    def limited(self) -> bool:
+        return self.max_tokens is not None or self.max_calls is not None
+
+    def fits(self, tokens: float, calls: float) -> bool:
+        """Whether spending tokens and calls more would stay within the budget"""
+        if self.max_tokens is not None and self.spent.total_tokens + tokens > self.max_tokens:
+            return False
+        if self.max_calls is not None and self.spent.calls + calls > self.max_calls:
+            return False
+        return True
+
+    def charge(self, usage: TokenUsage) -> None:
+        self.spent.add(usage)
+
+
+def prompt_estimate(prompt: str) -> TokenUsage:
+    """Estimated cost of one uncached generation of a rendered prompt"""
+    return TokenUsage(total_tokens=estimate_tokens(prompt) + DEFAULT_OUTPUT_TOKENS, calls=1)
+
+
+def budget_from_env(max_tokens: Optional[int] = None, max_calls: Optional[int] = None) -> RunBudget:
+    """Budget from explicit limits, falling back to EVAL_TOKEN_BUDGET / EVAL_CALL_BUDGET"""
+    tokens = max_tokens or os.getenv('EVAL_TOKEN_BUDGET')
+    calls = max_calls or os.getenv('EVAL_CALL_BUDGET')
+    return RunBudget(int(tokens) if tokens else None, int(calls) if calls else None)
+
+
+def prioritized(scenarios: Iterable[Dict[str, Any]], window: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield scenarios by descending 'priority' (default 0), stable for equal priorities
+
+    With a window only that many scenarios are buffered and ordered at a time,
+    so a streamed corpus is never fully materialized.
+    """
+    iterator = iter(scenarios)
+    tiebreak = count()
+    while True:
+        chunk = list(islice(iterator, window)) if window else list(iterator)
+        if not chunk:
+            return
+        heap = [(-scenario.get('priority', 0), next(tiebreak), scenario) for scenario in chunk]
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[2]
+        if not window:
+            return
+
+
+class BudgetScheduler:
+    """
+    Hands out generation batches while the budget lasts
+
+    Each scenario is admitted only if its estimated cost still fits: the
+    length of its rendered prompt (template plus payload) plus
+    DEFAULT_OUTPUT_TOKENS and one call, raised to the observed mean tokens and
+    calls per scenario once any have been recorded. The mean never lowers the
+    estimate, since batches served from the response cache or by dedup can
+    record almost nothing while the next batch still has to be generated.
+    Until usage has been recorded, a limited run hands out a probe batch of
+    at most PROBE_BATCH_SIZE scenarios. When the
+    next scenario does not fit, the scheduler stops cleanly; everything
+    generated so far has already been yielded, so callers keep their partial
+    results.
+    """
+
+    def __init__(self, budget: RunBudget, batch_size: int, window: Optional[int] = 4096):
+        self.budget = budget
+        self.batch_size = batch_size
+        self.window = window
+        self.scheduled = 0
+        self.exhausted = False
+        self._recorded_scenarios = 0
+        # Spent by this scheduler's batches only; the budget may also be charged elsewhere
+        self._recorded = TokenUsage()
+
+    def estimate(self, scenario: Dict[str, Any]) -> TokenUsage:
+        """Estimated tokens and calls to generate one scenario"""
+        if 'stored' in scenario:
+            # Stored outputs are only re-scored (incremental runs), which spends nothing
+            return TokenUsage()
+        if not self.budget.limited:
+            # Everything fits, so skip rendering the prompt just to estimate it
+            return TokenUsage()
+        estimate = prompt_estimate(create_test_input(scenario.get('data', {})))
+        if self._recorded_scenarios:
+            estimate.total_tokens = max(estimate.total_tokens, self._recorded.total_tokens / self._recorded_scenarios)
+            estimate.calls = max(estimate.calls, self._recorded.calls / self._recorded_scenarios)
+        return estimate
+
+    def _batch_limit(self) -> int:
+        if self.budget.limited and not self._recorded_scenarios:
+            return min(self.batch_size, PROBE_BATCH_SIZE)
+        return self.batch_size
+
+    def batches(self, scenarios: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches in priority order until the budget would be exceeded"""
+        if not self.budget.limited:
+            # Unbounded runs keep the input order
+            ordered = iter(scenarios)
+        else:
+            ordered = prioritized(scenarios, self.window)
+
+        batch: List[Dict[str, Any]] = []
+        pending_tokens = pending_calls = 0.0
+        for scenario in ordered:
+            estimate = self.estimate(scenario)
+            if not self.budget.fits(pending_tokens + estimate.total_tokens, pending_calls + estimate.calls):
+                if batch:
+                    yield batch
+                    batch, pending_tokens, pending_calls = [], 0.0, 0.0
+                    # Re-check against the actual spend of the batch just generated
+                    estimate = self.estimate(scenario)
+                    if self.budget.fits(estimate.total_tokens, estimate.calls):
+                        batch.append(scenario)
+                        pending_tokens, pending_calls = estimate.total_tokens, estimate.calls
+                        self.scheduled += 1
+                        continue
+                self.exhausted = True
+                return
+
+            batch.append(scenario)
+            pending_tokens += estimate.total_tokens
+            pending_calls += estimate.calls
+            self.scheduled += 1
+            if len(batch) >= self._batch_limit():
+                yield batch
+                batch, pending_tokens, pending_calls = [], 0.0, 0.0
+
+        if batch:
+            yield batch
+
+    def record(self, usages: List[TokenUsage]) -> None:
+        """Charge the per-scenario usage of a generated batch"""
+        for usage in usages:
+            self.budget.charge(usage)
+            self._recorded.add(usage)
+        self._recorded_scenarios += len(usages)
+
+
+def generate_within_budget(gemini_model: Any, data_payload: Dict[str, Any],
+                           budget: Optional[RunBudget] = None, prompt: Optional[str] = None) -> Optional[str]:
+    """
+    Generate one scenario outside a scheduler, e.g. a quick single-scenario check
+
+    The generation is charged to the budget so a run's checks and its scheduled
+    batches share one limit. Returns None without generating when the
+    scenario's estimated cost no longer fits. prompt, the payload's rendered
+    single-scenario prompt, is rendered here when not given.
+    """
+    budget = budget or RunBudget()
+    if prompt is None:
+        prompt = create_test_input(data_payload, payload_format=gemini_model.payload_format)
+    estimate = prompt_estimate(prompt)
+    if not budget.fits(estimate.total_tokens, estimate.calls):
+        return None
+    output = gemini_model.generate_for_payloads([data_payload], prompts=[prompt])[0]
+    for usage in gemini_model.last_usage:
+        budget.charge(usage)
+    return output
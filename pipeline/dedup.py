@@ -0,0 +1,75 @@
+"""
+Canonical-hash de-duplication of scenario payloads before generation
+"""
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from pipeline.results_sink import content_hash
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Normalize a JSON-like value so semantically equal payloads compare equal
+
+    Dict keys are sorted when hashed; integral floats become ints (1200.0 ->
+    1200), -0.0 becomes 0 and other floats are rounded to 10 significant
+    digits to absorb formatting noise. Tuples are treated as lists.
+    """
+    if isinstance(value, dict):
+        return {str(key): canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    if isinstance(value, float) and math.isfinite(value):
+        if value.is_integer():
+            return int(value)
+        return float(f"{value:.10g}")
+    return value
+
+
+def canonical_hash(value: Any) -> str:
+    """SHA-256 of the canonical form, equal for payloads differing only in key order or number formatting"""
+    return content_hash(canonicalize(value))
+
+
+class PayloadDeduplicator:
+    """
+    Maps payloads to canonical keys and remembers recent outputs per key
+
+    Keys are scoped, e.g. by prompt template and payload format, so only
+    requests that would send the same prompt to the same model share an
+    output. The output memo is bounded (LRU) so duplicates across batches
+    are served without keeping a whole corpus of outputs in memory.
+    """
+
+    def __init__(self, memo_size: int = 10000):
+        self.memo_size = memo_size
+        self.scenarios = 0
+        self.generated = 0
+        self._memo: 'OrderedDict[str, str]' = OrderedDict()
+
+    def keys(self, data_payloads: List[Dict[str, Any]], scope: str = '') -> List[str]:
+        return [f"{scope}:{canonical_hash(data_payload)}" for data_payload in data_payloads]
+
+    def recall(self, key: str) -> Optional[str]:
+        output = self._memo.get(key)
+        if output is not None:
+            self._memo.move_to_end(key)
+        return output
+
+    def remember(self, key: str, output: str) -> None:
+        self._memo[key] = output
+        self._memo.move_to_end(key)
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def record(self, scenarios: int, generated: int) -> None:
+        self.scenarios += scenarios
+        self.generated += generated
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'scenarios': self.scenarios,
+            'generated': self.generated,
+            'duplicates': self.scenarios - self.generated,
+            'dedup_ratio': (self.scenarios - self.generated) / self.scenarios if self.scenarios else 0.0
+        }
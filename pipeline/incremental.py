@@ -0,0 +1,182 @@
+"""
+Dependency tracking for incremental re-evaluation of stored results
+
+Every record in the results sink carries the hashes of what it was computed
+from: payload, prompt (template and rendering config) and model for the
+generated output (its key), and one fingerprint per metric for its scores. Comparing them with
+the current run decides what each scenario still needs:
+
+    up to date  every hash matches, nothing is recomputed
+    re-score    the output is still valid but some metrics changed; only those
+                metrics are re-scored on the stored output, without generation
+    generate    no stored output for this payload, prompt and model
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from metrics.memo import metric_fingerprint
+from models.token_usage import TokenUsage
+from pipeline.metric_runner import evaluate_metrics
+from pipeline.metric_scheduler import metric_key
+from pipeline.results_sink import ResultsSink, content_hash, record_key
+
+
+def metric_hashes(metrics: Sequence[Any]) -> Dict[str, str]:
+    """Fingerprint per metric key, stored with every record"""
+    return {metric_key(metric): metric_fingerprint(metric) for metric in metrics}
+
+
+class IncrementalPlan:
+    """
+    Classifies scenarios against the stored records of a results sink
+
+    Only keys are kept in memory: up-to-date ones, and for records whose
+    output is still valid but whose metrics are stale, the record's position
+    in the sink and the stale metric keys. Stored outputs and results are
+    read back from the sink batch by batch (generate_outputs). Later records
+    for a key supersede earlier ones, so re-scored records appended by a
+    previous incremental run are honored.
+    """
+
+    def __init__(self, prompt_hash: str, model_name: str, metrics: Sequence[Any]):
+        self.prompt_hash = prompt_hash
+        self.model_name = model_name
+        self.metric_hashes = metric_hashes(metrics)
+        self.up_to_date = 0
+        self.rescored = 0
+        self.generated = 0
+        self.sink: Optional[ResultsSink] = None
+        self._current: Set[str] = set()
+        self._stale: Dict[str, Tuple[int, List[str]]] = {}
+
+    def stale_metrics(self, record: Dict[str, Any]) -> List[str]:
+        """
+        Metrics of the current run whose stored result is missing, errored or from another fingerprint
+
+        A result skipped by a gating metric is stale when that gate is, since
+        its re-score may pass.
+        """
+        stored_hashes = record.get('metric_hashes') or {}
+        stored_results = record.get('metrics') or {}
+        stale = {
+            name for name, fingerprint in self.metric_hashes.items()
+            if stored_hashes.get(name) != fingerprint or name not in stored_results or 'error' in stored_results[name]
+        }
+        stale.update(
+            name for name in self.metric_hashes
+            if name not in stale and stored_results[name].get('skipped_by') in stale
+        )
+        return [name for name in self.metric_hashes if name in stale]
+
+    def load(self, sink: ResultsSink) -> 'IncrementalPlan':
+        """Index the records of a results sink in one streaming pass"""
+        self.sink = sink
+        for position, record in sink.entries():
+            key = record.get('key')
+            if key is None or 'actual_output' not in record:
+                continue
+            stale = self.stale_metrics(record)
+            if stale:
+                self._current.discard(key)
+                self._stale[key] = (position, stale)
+            else:
+                self._stale.pop(key, None)
+                self._current.add(key)
+        return self
+
+    def pending(self, scenarios: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield scenarios that need work, each tagged with its record key
+
+        Yielded dicts are copies carrying 'key' and 'payload_hash' for the
+        record; scenarios to re-score also carry 'stored' with the sink, the
+        record's position in it and the keys of the stale metrics.
+        generate_outputs adds the stored output, usage and metric results.
+        """
+        for scenario in scenarios:
+            payload_hash = content_hash(scenario["data"])
+            key = record_key(payload_hash, self.prompt_hash, self.model_name)
+            if key in self._current:
+                self.up_to_date += 1
+                continue
+            stale = self._stale.get(key)
+            if stale is None:
+                self.generated += 1
+                yield dict(scenario, key=key, payload_hash=payload_hash)
+            else:
+                self.rescored += 1
+                position, stale_metrics = stale
+                stored = {'sink': self.sink, 'position': position, 'stale_metrics': stale_metrics}
+                yield dict(scenario, key=key, payload_hash=payload_hash, stored=stored)
+
+    def stats(self) -> Dict[str, int]:
+        return {'up_to_date': self.up_to_date, 'rescored': self.rescored, 'generated': self.generated}
+
+
+def load_stored(batch: Sequence[Dict[str, Any]]) -> None:
+    """Read the stored records of a batch's re-scored scenarios into their 'stored' dicts"""
+    by_sink: Dict[int, List[Dict[str, Any]]] = {}
+    for scenario in batch:
+        stored = scenario.get('stored')
+        if stored is not None and 'actual_output' not in stored:
+            by_sink.setdefault(id(stored['sink']), []).append(stored)
+    for group in by_sink.values():
+        records = group[0]['sink'].read_at([stored['position'] for stored in group])
+        for stored, record in zip(group, records):
+            stored['actual_output'] = record['actual_output']
+            stored['usage'] = record.get('usage')
+            stored['metrics'] = record.get('metrics') or {}
+
+
+def generate_outputs(gemini_model: Any, batch: Sequence[Dict[str, Any]],
+                     prompts: Optional[Sequence[str]] = None) -> Tuple[List[str], List[TokenUsage], List[TokenUsage]]:
+    """
+    Outputs for a batch, generating only scenarios without a stored output
+
+    Stored outputs are read from the results sink here, so only the current
+    batch's stored records are held in memory. prompts, the batch's rendered
+    single-scenario prompts (the test case inputs), are sent as they are
+    rather than rendered again.
+
+    Returns:
+        (outputs, usages, spent): outputs and usage per scenario in batch order,
+        stored scenarios keeping the usage recorded when they were generated,
+        and the usage of the scenarios generated now, for the budget scheduler
+    """
+    load_stored(batch)
+    outputs: List[str] = [''] * len(batch)
+    usages: List[TokenUsage] = [TokenUsage() for _ in batch]
+    missing = []
+    for index, scenario in enumerate(batch):
+        stored = scenario.get('stored')
+        if stored is None:
+            missing.append(index)
+            continue
+        outputs[index] = stored['actual_output']
+        if stored.get('usage'):
+            usages[index] = TokenUsage(**stored['usage'])
+
+    spent: List[TokenUsage] = []
+    if missing:
+        generated = gemini_model.generate_for_payloads([batch[index]["data"] for index in missing],
+                                                       prompts=[prompts[index] for index in missing] if prompts else None)
+        spent = list(gemini_model.last_usage)
+        for index, output, usage in zip(missing, generated, spent):
+            outputs[index] = output
+            usages[index] = usage
+    return outputs, usages, spent
+
+
+def evaluate_pending_metrics(test_cases: Sequence[Any], scenarios: Sequence[Dict[str, Any]],
+                             metrics: Any) -> List[Dict[str, Dict[str, Any]]]:
+    """
+    evaluate_metrics over a batch, re-scoring stored scenarios on their stale metrics only
+
+    Stored results of the other metrics are passed as known, so they are kept
+    and still gate costlier metrics. Returns one result dict per test case.
+    """
+    known = []
+    for scenario in scenarios:
+        stored = scenario.get('stored')
+        known.append({
+            name: result for name, result in stored['metrics'].items() if name not in stored['stale_metrics']
+        } if stored else {})
+    return evaluate_metrics(test_cases, metrics, known=known)
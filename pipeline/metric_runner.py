@@ -0,0 +1,229 @@
+"""
+Multi-process metric evaluation runner
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from pipeline import tracing
+from pipeline.metric_scheduler import MetricSchedule, as_schedule, metric_key
+from metrics.memo import MetricMemo, get_metric_memo, memo_key, set_metric_memo
+
+
+def _metric_error(error: Exception) -> Dict[str, Any]:
+    return {
+        'score': 0.0,
+        'success': False,
+        'reason': f"Error: {str(error)}",
+        'error': str(error)
+    }
+
+
+def _score(metric: Any, test_case: Any) -> Dict[str, Any]:
+    try:
+        score = metric.measure(test_case)
+        return {
+            'score': score,
+            'success': metric.is_successful(),
+            'reason': metric.reason
+        }
+    except Exception as e:
+        return _metric_error(e)
+
+
+def _run_chunk(test_cases: Sequence[Any], schedule: MetricSchedule,
+               known: Optional[Sequence[Mapping[str, Any]]] = None) -> List[Dict[str, Dict[str, Any]]]:
+    """Run the schedule on every test case of a chunk, isolating per-metric errors"""
+    chunk_results = []
+    with tracing.span('runner.chunk'):
+        for index, test_case in enumerate(test_cases):
+            case_known = known[index] if known else {}
+            chunk_results.append(schedule.evaluate(
+                lambda metric: case_known.get(metric_key(metric)) or _score(metric, test_case)
+            ))
+    return chunk_results
+
+
+def _run_chunk_traced(test_cases: Sequence[Any], schedule: MetricSchedule,
+                      known: Optional[Sequence[Mapping[str, Any]]] = None):
+    """_run_chunk in a worker process, shipping the worker's spans back with the results"""
+    # Drop anything a failed earlier task left behind in this reused worker
+    tracing.drain()
+    return _run_chunk(test_cases, schedule, known), tracing.drain()
+
+
+def _init_worker() -> None:
+    # Workers score only what the parent found unmemoized and it stores their
+    # results, so they skip the memo and never touch an inherited SQLite handle
+    set_metric_memo(None)
+
+
+def _memoized_results(memo: MetricMemo, test_case: Any, schedule: MetricSchedule,
+                      known: Mapping[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """All scheduled results for a test case from known results and the memo, or None if any is missing"""
+    def lookup(metric: Any) -> Optional[Dict[str, Any]]:
+        key = metric_key(metric)
+        if key in known:
+            return known[key]
+        entry = memo.get(memo_key(metric, test_case))
+        if entry is None:
+            return None
+        score, success, reason = entry
+        return {'score': score, 'success': success, 'reason': reason}
+    return schedule.evaluate(lookup)
+
+
+def _store_results(memo: MetricMemo, test_cases: Sequence[Any], results: Sequence[Dict[str, Dict[str, Any]]],
+                   metrics: Sequence[Any]) -> None:
+    items = []
+    for test_case, case_results in zip(test_cases, results):
+        for metric in metrics:
+            result = case_results.get(metric_key(metric))
+            if result is not None and 'error' not in result and 'skipped_by' not in result:
+                items.append((memo_key(metric, test_case), (result['score'], result['success'], result['reason'])))
+    memo.set_many(items)
+
+
+def default_workers() -> int:
+    """Worker count from EVAL_WORKERS, defaulting to the CPUs available to this process"""
+    configured = int(os.getenv('EVAL_WORKERS') or 0)
+    if configured:
+        return configured
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _pool_context():
+    """
+    Start method for metric workers: forkserver where available, else spawn
+
+    The parent has usually opened gRPC channels and threads by the time it
+    scores, and forking such a process can deadlock the child; both start
+    methods launch workers from a clean interpreter instead.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def get_metric_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process-wide worker pool for metric scoring, started once and reused by every batch
+
+    Asking for a different worker count replaces the pool, as does a pool
+    broken by a crashed worker (see discard_metric_pool).
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=_init_worker)
+            _pool_workers = workers
+        return _pool
+
+
+def discard_metric_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next get_metric_pool starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def evaluate_metrics(test_cases: Sequence[Any], metrics: Any,
+                     max_workers: Optional[int] = None,
+                     chunk_size: Optional[int] = None,
+                     known: Optional[Sequence[Mapping[str, Any]]] = None) -> List[Dict[str, Dict[str, Any]]]:
+    """
+    Score test cases with metrics across a process pool
+
+    Test cases are split into chunks that run all metrics, so each output is
+    parsed once per chunk. Chunks run on the process-wide pool from
+    get_metric_pool, so workers start once per run rather than per call. A
+    chunk that fails as a whole (e.g. a worker crash or an unpicklable test
+    case) only marks its own cells as errors. Results go through the metric
+    memo, so unchanged test cases are looked up rather than re-scored, and
+    its disk writes are committed once per call. With a MetricSchedule, metrics run cheapest first and a
+    failing gating metric skips costlier ones, whose cells carry 'skipped_by'.
+
+    Args:
+        test_cases: Test cases exposing input and actual_output
+        metrics: Metric instances or a MetricSchedule; each worker scores with its own copy
+        max_workers: Worker processes, defaults to EVAL_WORKERS or the CPU count
+        chunk_size: Test cases per task, defaults to an even split of ~4 chunks per worker
+        known: Per test case, {metric key: result} still valid from an earlier run; not re-scored
+
+    Returns:
+        One {metric key: {'score', 'success', 'reason'}} dict per test case, in input order,
+        keyed by metric_key (the metric's class name)
+    """
+    test_cases = list(test_cases)
+    schedule = as_schedule(metrics)
+    workers = max_workers or default_workers()
+
+    memo = get_metric_memo()
+    if workers <= 1 or len(test_cases) <= 1:
+        # Metrics look up and store their own memoized results in process
+        results = _run_chunk(test_cases, schedule, known)
+        if memo is not None:
+            memo.flush()
+        schedule.record(results, known)
+        return results
+
+    # Test cases with every scheduled metric known or memoized are not sent to the pool
+    results: List[Optional[Dict[str, Dict[str, Any]]]] = [None] * len(test_cases)
+    pending = []
+    for index, test_case in enumerate(test_cases):
+        case_known = known[index] if known else {}
+        results[index] = _memoized_results(memo, test_case, schedule, case_known) if memo is not None else None
+        if results[index] is None:
+            pending.append(index)
+    if not pending:
+        schedule.record(results, known)
+        return results
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(pending) // (workers * 4)))
+    chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+
+    executor = get_metric_pool(workers)
+    task = _run_chunk_traced if tracing.enabled() else _run_chunk
+    futures = []
+    for chunk in chunks:
+        try:
+            futures.append(executor.submit(task, [test_cases[index] for index in chunk], schedule,
+                                           [known[index] for index in chunk] if known else None))
+        except BrokenProcessPool as e:
+            futures.append(e)
+    for chunk, future in zip(chunks, futures):
+        try:
+            if isinstance(future, BaseException):
+                raise future
+            if tracing.enabled():
+                chunk_results, events = future.result()
+                tracing.merge(events)
+            else:
+                chunk_results = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                discard_metric_pool(executor)
+            chunk_results = [{metric_key(metric): _metric_error(e) for metric in schedule.metrics} for _ in chunk]
+        for index, case_results in zip(chunk, chunk_results):
+            results[index] = case_results
+
+    if memo is not None:
+        _store_results(memo, [test_cases[index] for index in pending], [results[index] for index in pending],
+                       schedule.metrics)
+        # One commit for the batch
+        memo.flush()
+    schedule.record(results, known)
+    return results
@@ -0,0 +1,121 @@
+"""
+Cheap-first metric scheduling with gating metrics
+"""
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence
+
+# Estimated tokens per evaluation for metrics that declare no cost, e.g. deepeval's LLM-as-judge metrics
+DEFAULT_METRIC_COST = 1500
+
+
+def metric_key(metric: Any) -> str:
+    """
+    Identity of a metric in results, costs, gating and stored records: its class name
+
+    Display names (__name__) can be shared, e.g. FormatComplianceMetric and
+    MinimalFormatMetric are both "Format Compliance", so they are for display only.
+    """
+    return type(metric).__name__
+
+
+def metric_names(metrics: Iterable[Any]) -> Dict[str, str]:
+    """Display name per metric key, for printing results keyed by metric_key"""
+    return {metric_key(metric): metric.__name__ for metric in metrics}
+
+
+def metric_cost(metric: Any, costs: Optional[Mapping[str, float]] = None) -> float:
+    """Declared cost of one evaluation: costs[metric_key], the metric's estimated_cost, or DEFAULT_METRIC_COST"""
+    key = metric_key(metric)
+    if costs and key in costs:
+        return costs[key]
+    cost = getattr(metric, 'estimated_cost', None)
+    return DEFAULT_METRIC_COST if cost is None else cost
+
+
+def skipped_result(gate: Any) -> Dict[str, Any]:
+    return {
+        'score': 0.0,
+        'success': False,
+        'reason': f"Skipped: gating metric {gate.__name__} failed",
+        'skipped_by': metric_key(gate)
+    }
+
+
+class MetricSchedule:
+    """
+    Metrics run cheapest first, where a failing gating metric skips costlier ones
+
+    Each test case walks the metrics in ascending declared cost (declared
+    order for ties). Once a gating metric fails, every later metric costlier
+    than it is recorded as skipped instead of evaluated; equally cheap ones
+    still run so reports keep their rule-based checks. Results are returned
+    in declared order, and record() totals evaluated and skipped cells with
+    their estimated cost.
+
+    Results are keyed by metric_key, so each metric class may appear once;
+    gating takes metric classes.
+    """
+
+    def __init__(self, metrics: Sequence[Any], gating: Iterable[type] = (),
+                 costs: Optional[Mapping[str, float]] = None):
+        self.metrics = list(metrics)
+        keys = [metric_key(metric) for metric in self.metrics]
+        duplicates = sorted({key for key in keys if keys.count(key) > 1})
+        if duplicates:
+            raise ValueError(f"Metrics are keyed by class, so each class may appear once; repeated: {', '.join(duplicates)}")
+        gating = tuple(gating)
+        self.gating = {metric_key(metric) for metric in self.metrics if gating and isinstance(metric, gating)}
+        self.costs = {metric_key(metric): metric_cost(metric, costs) for metric in self.metrics}
+        self.order = sorted(self.metrics, key=lambda metric: self.costs[metric_key(metric)])
+        self.evaluated = 0
+        self.skipped = 0
+        self.cost_spent = 0.0
+        self.cost_saved = 0.0
+
+    def evaluate(self, score: Callable[[Any], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Results of one test case, scoring each metric that is not skipped with score(metric)
+
+        Returns None as soon as score returns None, e.g. for a memo miss.
+        """
+        results = {}
+        failed_gate = None
+        for metric in self.order:
+            key = metric_key(metric)
+            if failed_gate is not None and self.costs[key] > self.costs[metric_key(failed_gate)]:
+                results[key] = skipped_result(failed_gate)
+                continue
+            result = score(metric)
+            if result is None:
+                return None
+            results[key] = result
+            if failed_gate is None and key in self.gating and not result['success']:
+                failed_gate = metric
+        return {key: results[key] for key in map(metric_key, self.metrics)}
+
+    def record(self, results: Sequence[Dict[str, Dict[str, Any]]],
+               known: Optional[Sequence[Mapping[str, Any]]] = None) -> None:
+        """Count the cells of scored test cases, leaving out results that were already known"""
+        for index, case_results in enumerate(results):
+            case_known = known[index] if known else {}
+            for key, result in case_results.items():
+                if key in case_known:
+                    continue
+                if 'skipped_by' in result:
+                    self.skipped += 1
+                    self.cost_saved += self.costs.get(key, 0)
+                else:
+                    self.evaluated += 1
+                    self.cost_spent += self.costs.get(key, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'evaluated': self.evaluated,
+            'skipped': self.skipped,
+            'estimated_cost_spent': self.cost_spent,
+            'estimated_cost_saved': self.cost_saved
+        }
+
+
+def as_schedule(metrics: Any) -> MetricSchedule:
+    """A MetricSchedule as is, or a plain metric list scheduled without gating"""
+    return metrics if isinstance(metrics, MetricSchedule) else MetricSchedule(metrics)
@@ -0,0 +1,128 @@
+"""
+Append-only results sink for resumable evaluation runs
+"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+
+def content_hash(value: Any) -> str:
+    """Stable SHA-256 of a string or JSON-serializable value"""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def record_key(payload_hash: str, prompt_hash: str, model_name: str) -> str:
+    """Identity of one scenario result: the same payload, prompt (template and rendering config) and model"""
+    return f"{model_name}:{prompt_hash[:16]}:{payload_hash}"
+
+
+def pending_scenarios(scenarios: Iterable[Dict[str, Any]], completed: Set[str],
+                      prompt_hash: str, model_name: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield scenarios without a stored result, each tagged with its record key
+
+    Yielded dicts are copies carrying 'key' and 'payload_hash' for the record.
+    """
+    for scenario in scenarios:
+        payload_hash = content_hash(scenario["data"])
+        key = record_key(payload_hash, prompt_hash, model_name)
+        if key in completed:
+            continue
+        yield dict(scenario, key=key, payload_hash=payload_hash)
+
+
+class ResultsSink:
+    """
+    Per-scenario results written as JSONL lines as they complete
+
+    With a path, every record is flushed to disk immediately so a crashed run
+    loses at most the scenario in flight, and completed_keys() lets a restarted
+    run skip finished scenarios. Without a path, records are kept in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._records: List[Dict[str, Any]] = []
+        self._file = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # A crash mid-write can leave a partial last line; start a fresh one
+            needs_newline = False
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                with open(path, 'rb') as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    needs_newline = existing.read(1) != b'\n'
+            self._file = open(path, 'a', encoding='utf-8')
+            if needs_newline:
+                self._file.write('\n')
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self.path is None:
+            self._records.append(record)
+            return
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Stream every stored record, skipping a truncated trailing line"""
+        for _, record in self.entries():
+            yield record
+
+    def entries(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream (position, record) pairs; a position is a byte offset on disk, an index in memory"""
+        if self.path is None:
+            yield from enumerate(self._records)
+            return
+        with open(self.path, 'rb') as file:
+            offset = 0
+            for line in file:
+                position = offset
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    yield position, json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def read_at(self, positions: Sequence[int]) -> List[Dict[str, Any]]:
+        """Records at positions from entries(), read without scanning the rest of the file"""
+        if self.path is None:
+            return [self._records[position] for position in positions]
+        records = []
+        with open(self.path, 'rb') as file:
+            for position in positions:
+                file.seek(position)
+                records.append(json.loads(file.readline()))
+        return records
+
+    def latest(self) -> Iterator[Dict[str, Any]]:
+        """Stream only the most recent record per key, e.g. once incremental runs appended re-scored records"""
+        last_positions = {}
+        for position, record in self.entries():
+            if 'key' in record:
+                last_positions[record['key']] = position
+        for position, record in self.entries():
+            if 'key' not in record or last_positions.get(record['key']) == position:
+                yield record
+
+    def completed_keys(self) -> Set[str]:
+        """Keys of scenarios that already have a result"""
+        return {record['key'] for record in self if 'key' in record}
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,181 @@
+"""
+Lightweight span tracing for evaluation runs
+
+Enabled by setting EVAL_TRACE to an output path, in the environment or in
+.env. It is read once at import and again by configure(), which load_env()
+calls after loading .env, so spans only check a cached value. When it is
+unset, span() returns a shared no-op context manager and traced() wrappers
+call straight through. At the end of a run, finish()
+writes a Chrome trace-event JSON (open it in chrome://tracing or
+https://ui.perfetto.dev) and prints a per-stage table.
+
+Spans recorded inside an asyncio task go on that task's own track, so
+concurrent requests on one thread do not overlap on a single track.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import nullcontext
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# (name, start us, duration us, pid, track)
+Event = Tuple[str, int, int, int, int]
+
+_events: List[Event] = []
+_NULL_SPAN = nullcontext()
+_path: Optional[str] = os.getenv('EVAL_TRACE') or None
+
+
+def configure(path: Optional[str] = None) -> None:
+    """Set the output path, re-reading EVAL_TRACE when none is given (e.g. after .env is loaded)"""
+    global _path
+    _path = path or os.getenv('EVAL_TRACE') or None
+
+
+def trace_path() -> Optional[str]:
+    """Output path from EVAL_TRACE as of import or the last configure()"""
+    return _path
+
+
+def enabled() -> bool:
+    return _path is not None
+
+
+def _track() -> int:
+    """Current asyncio task, or the thread outside a running event loop"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        _events.append((self.name, self.start // 1000, (end - self.start) // 1000,
+                        os.getpid(), _track()))
+        return False
+
+
+def span(name: str):
+    """Context manager timing the enclosed block as one span named name"""
+    if _path is None:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator recording each call as a span, named after the function by default
+
+    The cached EVAL_TRACE setting is checked per call; without it the
+    function is called directly.
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _path is None:
+                return func(*args, **kwargs)
+            with _Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def drain() -> List[Event]:
+    """Remove and return the recorded events, e.g. to ship them from a worker process"""
+    events = _events[:]
+    del _events[:len(events)]
+    return events
+
+
+def merge(events: List[Event]) -> None:
+    """Add events recorded in another process"""
+    _events.extend(events)
+
+
+def _covered(intervals: List[Tuple[int, int]]) -> int:
+    """Time covered by at least one of the (start, duration) intervals"""
+    covered = 0
+    end = None
+    for start, duration in sorted(intervals):
+        if end is None or start > end:
+            covered += duration
+            end = start + duration
+        elif start + duration > end:
+            covered += start + duration - end
+            end = start + duration
+    return covered
+
+
+def aggregate(events: List[Event]) -> Dict[str, Dict[str, float]]:
+    """
+    Count, total, wall, mean and p95 duration (seconds) per span name
+
+    total sums every span, so concurrent spans count once each and can exceed
+    the run's wall time; wall is the time during which at least one was open.
+    """
+    durations: Dict[str, List[int]] = {}
+    intervals: Dict[str, List[Tuple[int, int]]] = {}
+    for name, start, duration, _, _ in events:
+        durations.setdefault(name, []).append(duration)
+        intervals.setdefault(name, []).append((start, duration))
+
+    table = {}
+    for name, values in durations.items():
+        values.sort()
+        total = sum(values)
+        table[name] = {
+            'count': len(values),
+            'total': total / 1e6,
+            'wall': _covered(intervals[name]) / 1e6,
+            'mean': total / len(values) / 1e6,
+            'p95': values[min(len(values) - 1, int(0.95 * len(values)))] / 1e6
+        }
+    return table
+
+
+def write_chrome_trace(path: str, events: List[Event]) -> None:
+    trace_events = [
+        {'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'ts': start, 'dur': duration,
+         'pid': pid, 'tid': track}
+        for name, start, duration, pid, track in events
+    ]
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, file)
+
+
+def finish() -> Optional[Dict[str, Dict[str, float]]]:
+    """Write the Chrome trace and print the per-stage table; no-op when tracing is disabled"""
+    path = trace_path()
+    if path is None:
+        return None
+
+    events = drain()
+    write_chrome_trace(path, events)
+    table = aggregate(events)
+
+    print(f"\n{'Stage':<45} {'count':>8} {'sum s':>10} {'wall s':>10} {'mean ms':>10} {'p95 ms':>10}")
+    for name, row in sorted(table.items(), key=lambda item: item[1]['wall'], reverse=True):
+        print(f"{name:<45} {row['count']:>8} {row['total']:>10.3f} {row['wall']:>10.3f} "
+              f"{row['mean'] * 1000:>10.2f} {row['p95'] * 1000:>10.2f}")
+    print("sum s adds up overlapping spans (concurrent requests, parallel workers); "
+          "wall s is the time at least one was open")
+    print(f"Trace written to {path} ({len(events)} spans)")
+    return table
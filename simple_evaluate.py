@@ -2,9 +2,17 @@
 Standalone evaluation script for real estate analysis prompt testing
 """
 import json
-from models.llm_integration import GeminiModel, load_prompt_template, create_test_input
+import argparse
+from models.llm_integration import get_gemini_model, create_test_input, load_env, print_generation_stats
 from metrics.custom_metrics import BuyerProfileAccuracyMetric, FormatComplianceMetric, ThemeStructureMetric
+from metrics.parsing import parse_output
+from pipeline.results_sink import ResultsSink, pending_scenarios
+from pipeline.incremental import IncrementalPlan, evaluate_pending_metrics, generate_outputs, metric_hashes
+from pipeline.metric_scheduler import metric_names
+from pipeline import tracing
 from data.test_data import MARINA_BAY_DATA, YIELD_INVESTOR_SCENARIO, LEGACY_BUYER_SCENARIO
+from data.scenario_loader import DEFAULT_BATCH_SIZE, iter_scenarios, parse_line_range
+from pipeline.budget import BudgetScheduler, RunBudget, budget_from_env, generate_within_budget
 
 
 class SimpleTestCase:
@@ -16,79 +24,117 @@ class SimpleTestCase:
         self.context = context or []
 
 
-def create_test_cases():
-    """Create test cases for evaluation"""
+# Test scenarios with expected outcomes
+SCENARIOS = [
+    {
+        "name": "Waterfront Residences - Legacy Buyer",
+        "data": MARINA_BAY_DATA,
+        "expected_profile": "legacy_owner_occupier",
+        "expected_challenge": "price_sensitivity"
+    },
+    {
+        "name": "Compact Towers - Yield Investor", 
+        "data": YIELD_INVESTOR_SCENARIO,
+        "expected_profile": "yield_investor",
+        "expected_challenge": "market_competition"
+    },
+    {
+        "name": "Premium Towers - Legacy Buyer",
+        "data": LEGACY_BUYER_SCENARIO, 
+        "expected_profile": "legacy_owner_occupier",
+        "expected_challenge": "age_condition"
+    }
+]
+
+
+def generate_test_cases(scenarios=None, gemini_model=None, budget=None):
+    """
+    Yield lists of (scenario, test case) pairs, one generation batch at a time
+    
+    Yielded scenarios are copies carrying the token 'usage' of their generation.
+    Scenarios with a 'stored' output (incremental runs) reuse it instead of generating.
+    With a limited budget, scenarios run by descending 'priority' and generation
+    stops before the budget would be exceeded.
+    """
     
     # Initialize the model
-    gemini_model = GeminiModel()
-    prompt_template = load_prompt_template()
-    
-    test_cases = []
-    
-    # Test scenarios with expected outcomes
-    scenarios = [
-        {
-            "name": "Waterfront Residences - Legacy Buyer",
-            "data": MARINA_BAY_DATA,
-            "expected_profile": "legacy_owner_occupier",
-            "expected_challenge": "price_sensitivity"
-        },
-        {
-            "name": "Compact Towers - Yield Investor", 
-            "data": YIELD_INVESTOR_SCENARIO,
-            "expected_profile": "yield_investor",
-            "expected_challenge": "market_competition"
-        },
-        {
-            "name": "Premium Towers - Legacy Buyer",
-            "data": LEGACY_BUYER_SCENARIO, 
-            "expected_profile": "legacy_owner_occupier",
-            "expected_challenge": "age_condition"
-        }
-    ]
+    gemini_model = gemini_model or get_gemini_model()
+    scenarios = scenarios if scenarios is not None else SCENARIOS
+    scheduler = BudgetScheduler(budget or RunBudget(), DEFAULT_BATCH_SIZE)
     
-    for scenario in scenarios:
-        print(f"\n{'='*50}")
-        print(f"Generating response for: {scenario['name']}")
-        print(f"{'='*50}")
-        
-        # Create input
-        test_input = create_test_input(scenario["data"])
+    # Scenarios may be a lazy stream, so generate them in bounded batches
+    for batch in scheduler.batches(scenarios):
+        # The single-scenario prompt is the test case input and, unpacked, the request sent to the model
+        test_inputs = [create_test_input(scenario["data"], payload_format=gemini_model.payload_format) for scenario in batch]
         
-        # Generate output
-        actual_output = gemini_model.generate_response(prompt_template, scenario["data"])
+        # Generate the batch concurrently (packed when GEMINI_PACK_SIZE > 1), results come back in scenario order
+        print(f"Generating responses for {sum(1 for scenario in batch if 'stored' not in scenario)} scenarios...")
+        with tracing.span('run.generate'):
+            outputs, usages, spent = generate_outputs(gemini_model, batch, test_inputs)
+        scheduler.record(spent)
         
-        # Create expected output (simplified for demo)
-        expected_output = f"""Expected analysis for {scenario['expected_profile']} with {scenario['expected_challenge']} challenge.
+        test_cases = []
+        for scenario, test_input, actual_output, usage in zip(batch, test_inputs, outputs, usages):
+            print(f"\n{'='*50}")
+            print(f"{'Stored' if 'stored' in scenario else 'Generated'} response for: {scenario['name']}")
+            print(f"{'='*50}")
+            
+            # Create expected output (simplified for demo)
+            expected_output = f"""Expected analysis for {scenario.get('expected_profile', 'unspecified')} with {scenario.get('expected_challenge', 'unspecified')} challenge.
         Should contain 3 bullet points under 80 characters each following Unit-Project-Location structure."""
+            
+            # Create test case
+            test_case = SimpleTestCase(
+                input_text=test_input,
+                actual_output=actual_output,
+                expected_output=expected_output,
+                context=[json.dumps(scenario["data"])]
+            )
+            
+            test_cases.append((dict(scenario, usage=usage.as_dict()), test_case))
+            
+            # Print the generated output for review
+            print("Generated Output:")
+            print(actual_output)
+            print("\n")
         
-        # Create test case
-        test_case = SimpleTestCase(
-            input_text=test_input,
-            actual_output=actual_output,
-            expected_output=expected_output,
-            context=[json.dumps(scenario["data"])]
-        )
-        
-        test_cases.append((scenario["name"], test_case))
-        
-        # Print the generated output for review
-        print("Generated Output:")
-        print(actual_output)
-        print("\n")
+        yield test_cases
     
-    return test_cases
+    if scheduler.exhausted:
+        print(f"Budget reached: stopped after {scheduler.scheduled} scenarios, remaining scenarios were not run")
+    print_generation_stats(gemini_model)
+
+
+def create_test_cases(scenarios=None):
+    """Create test cases for evaluation, optionally from a streamed scenario iterable"""
+    return [
+        (scenario["name"], test_case)
+        for batch in generate_test_cases(scenarios)
+        for scenario, test_case in batch
+    ]
 
 
-def run_manual_evaluation():
-    """Run manual evaluation with custom metrics"""
+def run_manual_evaluation(scenarios=None, results_path=None, budget=None, incremental=False):
+    """
+    Run manual evaluation with custom metrics
     
-    print("Creating test cases...")
-    test_cases = create_test_cases()
+    Each scenario's output and metric results are appended to the results sink
+    as soon as they are scored. With results_path, a restarted run skips
+    scenarios that already have a record for the same payload, prompt and model.
+    With incremental, recorded scenarios whose metrics changed since are re-scored
+    on their stored output instead of being skipped, without generation.
     
-    print(f"\n{'='*60}")
-    print("RUNNING EVALUATION")
-    print(f"{'='*60}")
+    Returns {'scenarios', 'passed', 'tests', 'tests_passed', 'results_path'}:
+    counts over the records in the sink, so scenarios recorded by earlier runs
+    are included, with 'passed' the scenarios that passed every metric. They
+    are counted while streaming the sink, so memory stays bounded; per-scenario
+    metric results, keyed by metric class name, are in the records at
+    results_path.
+    """
+    
+    gemini_model = get_gemini_model()
+    # Template plus rendering config, so outputs from another payload format or cache mode are not reused
+    prompt_hash = gemini_model.prompt_hash()
     
     # Define metrics to evaluate
     metrics = [
@@ -96,88 +142,130 @@ def run_manual_evaluation():
         FormatComplianceMetric(threshold=1.0),
         ThemeStructureMetric(threshold=0.7)
     ]
+    current_metric_hashes = metric_hashes(metrics)
+    # Results are keyed by metric class; display names are only for printing
+    names = metric_names(metrics)
+    
+    sink = ResultsSink(results_path)
+    plan = IncrementalPlan(prompt_hash, gemini_model.model_name, metrics).load(sink) if incremental and results_path else None
+    completed = sink.completed_keys() if results_path and plan is None else set()
+    if completed:
+        print(f"Resuming: {len(completed)} scenarios already recorded in {results_path}")
     
-    overall_results = []
+    scenarios = scenarios if scenarios is not None else SCENARIOS
+    if plan is not None:
+        scenarios = plan.pending(scenarios)
+    else:
+        scenarios = pending_scenarios(scenarios, completed, prompt_hash, gemini_model.model_name)
     
-    for scenario_name, test_case in test_cases:
-        print(f"\n{'-'*50}")
-        print(f"Evaluating: {scenario_name}")
-        print(f"{'-'*50}")
+    print("Creating test cases...")
+    for batch in generate_test_cases(scenarios, gemini_model, budget):
+        print(f"\n{'='*60}")
+        print("RUNNING EVALUATION")
+        print(f"{'='*60}")
         
-        scenario_results = {}
+        # Score every (test case, metric) pair across worker processes, results in scenario order;
+        # re-scored scenarios run only their stale metrics
+        all_results = evaluate_pending_metrics([test_case for _, test_case in batch],
+                                               [scenario for scenario, _ in batch], metrics)
         
-        # Run each metric
-        for metric in metrics:
-            try:
-                score = metric.measure(test_case)
-                success = metric.is_successful()
-                reason = metric.reason
-                
-                scenario_results[metric.__name__] = {
-                    'score': score,
-                    'success': success,
-                    'reason': reason
-                }
+        with tracing.span('run.print_results'):
+            for (scenario, test_case), scenario_results in zip(batch, all_results):
+                print(f"\n{'-'*50}")
+                print(f"Evaluating: {scenario['name']}")
+                print(f"{'-'*50}")
                 
-                print(f"{metric.__name__}: {score:.2f} ({'✅ PASS' if success else '❌ FAIL'})")
-                print(f"  Reason: {reason}")
+                for metric_key, result in scenario_results.items():
+                    metric_name = names[metric_key]
+                    if 'error' in result:
+                        print(f"{metric_name}: ❌ ERROR - {result['error']}")
+                    else:
+                        print(f"{metric_name}: {result['score']:.2f} ({'✅ PASS' if result['success'] else '❌ FAIL'})")
+                        print(f"  Reason: {result['reason']}")
                 
-            except Exception as e:
-                print(f"{metric.__name__}: ❌ ERROR - {str(e)}")
-                scenario_results[metric.__name__] = {
-                    'score': 0.0,
-                    'success': False,
-                    'reason': f"Error: {str(e)}"
-                }
-        
-        overall_results.append((scenario_name, scenario_results))
+                sink.append({
+                    'key': scenario['key'],
+                    'payload_hash': scenario['payload_hash'],
+                    'prompt_hash': prompt_hash,
+                    'model': gemini_model.model_name,
+                    'scenario': scenario['name'],
+                    'actual_output': test_case.actual_output,
+                    'usage': scenario['usage'],
+                    'metrics': scenario_results,
+                    'metric_hashes': current_metric_hashes
+                })
     
-    # Summary
+    if plan is not None:
+        stats = plan.stats()
+        print(f"Incremental: {stats['up_to_date']} up to date, {stats['rescored']} re-scored from stored outputs, "
+              f"{stats['generated']} generated")
+    
+    # Summary, streamed from the sink so it also covers results from earlier runs
     print(f"\n{'='*60}")
     print("EVALUATION SUMMARY")
     print(f"{'='*60}")
     
-    for scenario_name, results in overall_results:
-        print(f"\n{scenario_name}:")
-        total_score = sum(r['score'] for r in results.values())
-        avg_score = total_score / len(results)
-        total_passed = sum(1 for r in results.values() if r['success'])
-        
-        print(f"  Average Score: {avg_score:.2f}")
-        print(f"  Tests Passed: {total_passed}/{len(results)}")
-        
-        for metric_name, result in results.items():
-            status = "✅" if result['success'] else "❌"
-            print(f"    {status} {metric_name}: {result['score']:.2f}")
+    summary = {'scenarios': 0, 'passed': 0, 'tests': 0, 'tests_passed': 0, 'results_path': results_path}
+    with tracing.span('run.summary'):
+        for record in sink.latest():
+            if record.get('model') != gemini_model.model_name or record.get('prompt_hash') != prompt_hash:
+                continue
+            
+            results = record['metrics']
+            print(f"\n{record['scenario']}:")
+            total_score = sum(r['score'] for r in results.values())
+            avg_score = total_score / len(results)
+            total_passed = sum(1 for r in results.values() if r['success'])
+            summary['scenarios'] += 1
+            summary['passed'] += total_passed == len(results)
+            summary['tests'] += len(results)
+            summary['tests_passed'] += total_passed
+            
+            print(f"  Average Score: {avg_score:.2f}")
+            print(f"  Tests Passed: {total_passed}/{len(results)}")
+            if record.get('usage'):
+                print(f"  Tokens: {record['usage']['total_tokens']} over {record['usage']['calls']} calls")
+            
+            for metric_key, result in results.items():
+                status = "✅" if result['success'] else "❌"
+                print(f"    {status} {names.get(metric_key, metric_key)}: {result['score']:.2f}")
+    
+    print(f"\nOverall: {summary['passed']}/{summary['scenarios']} scenarios passed every metric, "
+          f"{summary['tests_passed']}/{summary['tests']} tests passed")
     
-    return overall_results
+    sink.close()
+    return summary
 
 
-def analyze_single_scenario(data_payload, scenario_name="Custom"):
-    """Analyze a single scenario for quick testing"""
+def analyze_single_scenario(data_payload, scenario_name="Custom", budget=None):
+    """Analyze a single scenario for quick testing, charged to the run budget if given"""
     
-    gemini_model = GeminiModel()
-    prompt_template = load_prompt_template()
+    gemini_model = get_gemini_model()
+    test_input = create_test_input(data_payload, payload_format=gemini_model.payload_format)
     
     print(f"\n{'='*50}")
     print(f"Analyzing: {scenario_name}")
     print(f"{'='*50}")
     
     # Generate analysis
-    result = gemini_model.generate_response(prompt_template, data_payload)
+    result = generate_within_budget(gemini_model, data_payload, budget, test_input)
+    if result is None:
+        print("Budget reached: single scenario analysis was not run")
+        return None
     
     print("Generated Analysis:")
     print(result)
     
-    # Quick format check
-    lines = [line.strip() for line in result.split('\n') if line.strip()]
-    bullet_lines = []
+    # Quick evaluation test case; its parsed output is shared with the metrics below
+    test_case = SimpleTestCase(
+        input_text=test_input,
+        actual_output=result,
+        expected_output="Quick test",
+        context=[json.dumps(data_payload)]
+    )
     
-    for line in lines:
-        if line.startswith(('•', '-', '*')):
-            bullet_lines.append(line)
-        elif len(line) > 10 and not line.endswith(':') and not line.startswith('**'):
-            bullet_lines.append(line)
+    # Quick format check
+    bullet_lines = parse_output(test_case).extract_bullets(min_length=10, fallback=False)
     
     print(f"\nQuick Format Check:")
     print(f"Number of bullets: {len(bullet_lines)}")
@@ -185,14 +273,6 @@ def analyze_single_scenario(data_payload, scenario_name="Custom"):
         clean_bullet = bullet.replace('•', '').replace('-', '').replace('*', '').strip()
         print(f"Bullet {i} ({len(clean_bullet)} chars): {clean_bullet}")
     
-    # Run quick evaluation
-    test_case = SimpleTestCase(
-        input_text=create_test_input(data_payload),
-        actual_output=result,
-        expected_output="Quick test",
-        context=[json.dumps(data_payload)]
-    )
-    
     print(f"\nQuick Metric Evaluation:")
     metrics = [
         BuyerProfileAccuracyMetric(threshold=0.8),
@@ -212,16 +292,34 @@ def analyze_single_scenario(data_payload, scenario_name="Custom"):
 
 
 if __name__ == "__main__":
-    # Run single scenario analysis first
+    load_env()
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", help="JSONL scenario file (.jsonl, .jsonl.gz or .jsonl.zst)")
+    parser.add_argument("--lines", help="Line range start:stop of the scenario file to evaluate")
+    parser.add_argument("--results", help="Append-only JSONL results file; rerunning resumes where it stopped")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --results, re-score recorded scenarios whose metrics changed and generate only new or invalidated ones")
+    parser.add_argument("--token-budget", type=int, help="Stop cleanly before the run exceeds this many tokens")
+    parser.add_argument("--call-budget", type=int, help="Stop cleanly before the run exceeds this many API calls")
+    args = parser.parse_args()
+    
+    scenarios = iter_scenarios(args.scenarios, *parse_line_range(args.lines)) if args.scenarios else None
+    budget = budget_from_env(args.token_budget, args.call_budget)
+    
+    # Run single scenario analysis first, within the same budget as the full evaluation
     print("Running single scenario analysis...")
-    analyze_single_scenario(MARINA_BAY_DATA, "Waterfront Residences")
+    analyze_single_scenario(MARINA_BAY_DATA, "Waterfront Residences", budget)
     
     # Run full evaluation
     print("\n" + "="*60)
     print("STARTING FULL EVALUATION")
     print("="*60)
     
-    results = run_manual_evaluation()
+    results = run_manual_evaluation(scenarios, args.results, budget, args.incremental)
+    
+    # Per-stage timings when EVAL_TRACE is set
+    tracing.finish()
     
     print("\n" + "="*60)
     print("EVALUATION COMPLETE")